@@ -11,11 +11,11 @@ from app.schemas.auth import (
     UserOut,
     UpdateProfileRequest
 )
+from app.core.dependencies import get_auth_service
 from app.services.auth_service import AuthService
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
-auth_service = AuthService()
 security = HTTPBearer(auto_error=False)
 
 async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)) -> str:
@@ -54,7 +54,10 @@ async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] =
     status_code=status.HTTP_201_CREATED,
     summary="Criar nova conta"
 )
-async def signup(body: SignupRequest):
+async def signup(
+    body: SignupRequest,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Endpoint para criar nova conta com validações de segurança:
     - Validação de força da senha
@@ -64,7 +67,7 @@ async def signup(body: SignupRequest):
     """
     try:
         result = await auth_service.signup(body)
-        logger.info(f"Nova conta criada: {body.email}")
+        logger.info("Nova conta criada: %s", body.email)
         return result
         
     except HTTPException:
@@ -81,11 +84,14 @@ async def signup(body: SignupRequest):
     response_model=TokenResponse, 
     summary="Autenticar e retornar JWT"
 )
-async def login(body: LoginRequest):
+async def login(
+    body: LoginRequest,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Endpoint para login com medidas de segurança:
     - Verificação de usuário ativo
-    - Delay contra timing attacks
+    - Custo de verificação constante contra timing attacks
     - Logging de tentativas suspeitas
     - Retorna access + refresh token
     """
@@ -107,7 +113,10 @@ async def login(body: LoginRequest):
     response_model=TokenResponse, 
     summary="Renovar token de acesso"
 )
-async def refresh_token(body: RefreshTokenRequest):
+async def refresh_token(
+    body: RefreshTokenRequest,
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Endpoint para renovar access token usando refresh token:
     - Verifica validade do refresh token
@@ -132,7 +141,10 @@ async def refresh_token(body: RefreshTokenRequest):
     response_model=UserOut, 
     summary="Dados do usuário autenticado"
 )
-async def get_user_profile(current_user_id: str = Depends(get_current_user)):
+async def get_user_profile(
+    current_user_id: str = Depends(get_current_user),
+    auth_service: AuthService = Depends(get_auth_service)
+):
     """
     Endpoint para obter dados do usuário atual:
     - Verifica token válido (dura 24 horas)
@@ -148,7 +160,7 @@ async def get_user_profile(current_user_id: str = Depends(get_current_user)):
                 detail="Usuário não encontrado"
             )
         
-        return UserOut(id=user.id, nome=user.nome, email=user.email, created_at=user.created_at)
+        return user
         
     except HTTPException:
         raise
@@ -166,7 +178,8 @@ async def get_user_profile(current_user_id: str = Depends(get_current_user)):
 )
 async def update_user_profile(
     update_data: UpdateProfileRequest,
-    current_user_id: str = Depends(get_current_user)
+    current_user_id: str = Depends(get_current_user),
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     Endpoint para atualizar dados do usuário atual:
@@ -185,8 +198,8 @@ async def update_user_profile(
                 detail="Não foi possível atualizar o perfil"
             )
         
-        logger.info(f"Perfil atualizado com sucesso: {updated_user.email}")
-        return UserOut(id=updated_user.id, nome=updated_user.nome, email=updated_user.email, created_at=updated_user.created_at)
+        logger.info("Perfil atualizado com sucesso: %s", updated_user.email)
+        return updated_user
         
     except HTTPException:
         raise
@@ -209,5 +222,5 @@ async def logout(current_user_id: str = Depends(get_current_user)):
     - Por enquanto, apenas confirma que o usuário está autenticado
     - Cliente deve descartar os tokens localmente
     """
-    logger.info(f"Logout realizado para usuário: {current_user_id}")
+    logger.info("Logout realizado para usuário: %s", current_user_id)
     return {"message": "Logout realizado com sucesso"}
\ No newline at end of file
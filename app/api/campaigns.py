@@ -81,17 +81,6 @@ async def start_campaign(
 ):
     """Inicia uma campanha com o personagem selecionado"""
     try:
-        campaign = await service.get_campaign_by_id(request.campaign_id, user_id=current_user_id)
-        if not campaign:
-            await service.seed_campaigns()
-            campaign = await service.get_campaign_by_id(request.campaign_id, user_id=current_user_id)
-        
-        if not campaign:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Campanha não encontrada"
-            )
-        
         updated_campaign = await service.start_campaign(
             campaign_id=request.campaign_id,
             character_id=request.character_id,
@@ -104,10 +93,10 @@ async def start_campaign(
             "message": f"Campanha '{updated_campaign.title}' iniciada com sucesso!",
             "campaign": updated_campaign
         }
-    except ValueError as e:
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campanha não encontrada"
         )
 
 @router.put("/{campaign_id}", response_model=CampaignOut)
@@ -203,11 +192,11 @@ async def seed_campaigns(
 
 @router.get("/world-lore/summary", response_model=Dict[str, Any])
 async def get_world_lore_summary(
-    current_user_id: str = Depends(get_current_user)
+    current_user_id: str = Depends(get_current_user),
+    vector_store: VectorStoreService = Depends(get_vector_store_service)
 ):
     """Retorna resumo do World Lore acumulado"""
     try:
-        vector_store = VectorStoreService()
         lore_summary = vector_store.get_world_lore_summary()
         
         return {
@@ -1,10 +1,18 @@
-from typing import Optional
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from pymongo.database import Database
+from fastapi.responses import StreamingResponse
 
-from app.core.database import get_database
+from app.core.dependencies import get_character_repository
 from app.repositories.character_repo import CharacterRepository
-from app.services.character_service import CharacterService
+from app.services.character_service import (
+    CharacterService,
+    decode_page_cursor,
+    encode_page_cursor
+)
 from app.schemas.character import (
     CharacterCreate,
     CharacterUpdate,
@@ -13,12 +21,16 @@ from app.schemas.character import (
 )
 from app.api.auth import get_current_user
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/characters", tags=["Characters"])
 
+_STREAM_MIN_LIMIT = 100
+
 
-def get_character_service(db: Database = Depends(get_database)) -> CharacterService:
+def get_character_service(
+    repository: CharacterRepository = Depends(get_character_repository)
+) -> CharacterService:
     """Dependency injection para o serviço de personagens"""
-    repository = CharacterRepository(db)
     return CharacterService(repository)
 
 
@@ -42,17 +54,62 @@ async def create_character(
 async def list_characters(
     page: int = Query(1, ge=1, description="Número da página"),
     limit: int = Query(100, ge=1, le=1000, description="Itens por página"),
+    cursor: Optional[str] = Query(None, description="Cursor (next_cursor) da página anterior"),
     service: CharacterService = Depends(get_character_service),
     current_user_id: str = Depends(get_current_user)
 ):
     """Lista apenas os personagens do usuário autenticado"""
     try:
-        result = await service.list_characters(current_user_id, page, limit)
+        if limit > _STREAM_MIN_LIMIT:
+            after, after_id = decode_page_cursor(cursor) if cursor else (None, None)
+            total = await service.repository.count(current_user_id)
+            return StreamingResponse(
+                _stream_characters(
+                    service.repository, current_user_id, page, limit, total, after, after_id
+                ),
+                media_type="application/json"
+            )
+        result = await service.list_characters(current_user_id, page, limit, cursor)
         return result
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+async def _stream_characters(
+    repository: CharacterRepository,
+    user_id: str,
+    page: int,
+    limit: int,
+    total: int,
+    after: Optional[datetime] = None,
+    after_id: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """Serializa a página de personagens em JSON à medida que o cursor avança"""
+    yield b'{"characters":['
+    last = None
+    count = 0
+    try:
+        async for character in repository.iter_all(
+            user_id, (page - 1) * limit, limit, after, after_id
+        ):
+            if last is not None:
+                yield b","
+            yield orjson.dumps(character.model_dump(mode="json", by_alias=True))
+            last = character
+            count += 1
+    except Exception:
+        # aborta a conexão: fechar o JSON aqui entregaria uma página truncada como se fosse válida
+        logger.exception("Erro ao transmitir personagens")
+        raise
+    pages = (total + limit - 1) // limit
+    next_cursor = encode_page_cursor(last) if count == limit else None
+    yield b"]," + orjson.dumps({
+        "total": total, "page": page, "limit": limit, "pages": pages, "next_cursor": next_cursor
+    })[1:]
+
+
 @router.get("/selected", response_model=CharacterResponse)
 async def get_selected_character(
     service: CharacterService = Depends(get_character_service),
@@ -172,12 +229,7 @@ async def get_character_inventory(
 ):
     """Retorna o inventário completo do personagem"""
     try:
-        from app.core.database import get_database
-        db = next(get_database())
-        from app.repositories.character_repo import CharacterRepository
-        
-        repo = CharacterRepository(db)
-        inventory = await repo.get_inventory(character_id, current_user_id)
+        inventory = await service.repository.get_inventory(character_id, current_user_id)
         
         return inventory
     except Exception as e:
@@ -1,69 +1,113 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import ValidationError
+from typing import Any, Dict, Optional, Tuple
 from app.schemas.llm import (
+    CHAT_HISTORY_ADAPTER,
     LLMChatRequest,
     LLMChatResponse,
-    ContextualAction,
+    ProgressionInfo,
     ProgressionResetResponse
 )
 from app.services.llm_service import LLMService
 from app.services.character_service import CharacterService
-from app.services.campaign_service import CampaignService
+from app.services.campaign_service import CampaignService, get_campaign_ctx, set_campaign_ctx
 from app.services.vector_store_service import VectorStoreService
 from app.repositories.character_repo import CharacterRepository
-from app.core.database import get_database
+from app.core.database import get_async_database
+from app.core.dependencies import get_character_repository, get_vector_store_service
 from app.api.auth import get_current_user
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/llm", tags=["LLM"])
 
-def get_llm_service() -> LLMService:
-    return LLMService()
+_CAMPAIGN_CONTEXT_FIELDS = {
+    "campaign_id", "title", "chapter", "current_chapter", "description", "full_description"
+}
+_CHARACTER_CONTEXT_FIELDS = {"name", "raca", "classe", "descricao", "atributos"}
+_CHARACTER_PROJECTION = dict.fromkeys(_CHARACTER_CONTEXT_FIELDS, 1)
+_ATRIBUTOS_DEFAULTS = {"vida": 20, "energia": 20, "forca": 10, "inteligencia": 10}
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
-def get_character_service(db = Depends(get_database)) -> CharacterService:
+
+def _inline_schema(schema: dict) -> dict:
+    """Resolve as referências $defs do JSON schema para uso direto no openapi_extra"""
+    defs = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref and ref.startswith("#/$defs/"):
+                return resolve(defs[ref.rsplit("/", 1)[-1]])
+            return {key: resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        return node
+
+    return resolve(schema)
+
+
+_CHAT_REQUEST_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": _inline_schema(LLMChatRequest.model_json_schema())}}
+    }
+}
+
+async def parse_chat_request(raw: Request) -> LLMChatRequest:
+    """Valida o corpo bruto direto no parser JSON do pydantic-core (sem json.loads intermediário)"""
+    try:
+        return LLMChatRequest.model_validate_json(await raw.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        )
+
+def get_llm_service(
+    vector_store: VectorStoreService = Depends(get_vector_store_service)
+) -> LLMService:
+    return LLMService(vector_store)
+
+def get_character_service(
+    repository: CharacterRepository = Depends(get_character_repository)
+) -> CharacterService:
     """Dependency injection para o serviço de personagens"""
-    repository = CharacterRepository(db)
     return CharacterService(repository)
 
-def get_campaign_service(db = Depends(get_database)) -> CampaignService:
+def get_campaign_service(
+    db = Depends(get_async_database),
+    vector_store: VectorStoreService = Depends(get_vector_store_service)
+) -> CampaignService:
     """Dependency injection para o serviço de campanhas com VectorStore"""
-    vector_store = VectorStoreService()
     return CampaignService(db, vector_store_service=vector_store)
 
-def get_vector_store_service() -> VectorStoreService:
-    return VectorStoreService()
-
-@router.post("/chat", response_model=LLMChatResponse, summary="Chat com LLM com progressão")
-async def chat_with_llm(
+async def _load_chat_context(
     request: LLMChatRequest,
-    llm_service: LLMService = Depends(get_llm_service),
-    character_service: CharacterService = Depends(get_character_service),
-    campaign_service: CampaignService = Depends(get_campaign_service),
-    current_user_id: str = Depends(get_current_user),
-    db = Depends(get_database)
-):
-    """
-    Envia mensagem para a LLM com sistema de progressão narrativa (10 interações)
-    e detecção automática de recompensas
-    """
-    try:
-        character_context = None
-        campaign_context = None
-        campaign_id = None
-        current_chapter = 1
+    current_user_id: str,
+    campaign_service: CampaignService,
+    character_service: CharacterService
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str], int]:
+    """Carrega os contextos de campanha ativa e personagem usados no prompt"""
+    character_context = None
+    campaign_context = None
+    campaign_id = None
+    current_chapter = 1
 
-        try:
-            active_campaign = await campaign_service.get_active_campaign(current_user_id)
-            if active_campaign:
-                chapter_field = getattr(active_campaign, 'chapter', None)
-                current_chapter_field = getattr(active_campaign, 'current_chapter', None)
-                title_field = getattr(active_campaign, 'title', 'SEM_TITULO')
-                campaign_id = active_campaign.campaign_id
+    try:
+        active_campaign = await campaign_service.get_active_campaign(current_user_id)
+        if active_campaign:
+            campaign_id = active_campaign.campaign_id
+            campaign_context = get_campaign_ctx(campaign_id, current_user_id, active_campaign.last_played_at)
+            
+            if campaign_context is None:
+                camp = active_campaign.model_dump(include=_CAMPAIGN_CONTEXT_FIELDS)
                 
                 try:
-                    ch_val = int(chapter_field) if chapter_field else 0
-                    curr_ch_val = int(current_chapter_field) if current_chapter_field else 0
+                    ch_val = int(camp["chapter"]) if camp["chapter"] else 0
+                    curr_ch_val = int(camp["current_chapter"]) if camp["current_chapter"] else 0
                     if ch_val > 0 and curr_ch_val > 0:
                         current_chapter = max(ch_val, curr_ch_val)
                     elif ch_val > 0:
@@ -76,118 +120,138 @@ async def chat_with_llm(
                     current_chapter = 1
                 
                 campaign_context = {
-                    "campaign_id": campaign_id,
-                    "title": title_field,
-                    "chapter": chapter_field,
+                    **camp,
                     "current_chapter": current_chapter,
-                    "description": getattr(active_campaign, 'description', ''),
-                    "full_description": getattr(active_campaign, 'full_description', ''),
                     "user_id": current_user_id,
                     "_id": campaign_id
                 }
-                logger.info(f"Contexto da campanha: {title_field} - Capítulo {current_chapter} - Interação {request.interaction_count}/10")
-        except Exception as campaign_error:
-            logger.error(f"Erro ao carregar campanha ativa: {campaign_error}")
-        
-        if request.character_id:
-            try:
-                character = await character_service.get_character(request.character_id, current_user_id)
-                if character:
-                    atributos_data = {}
-                    if hasattr(character, 'atributos') and character.atributos:
-                        if hasattr(character.atributos, 'vida'):
-                            atributos_data = {
-                                "vida": character.atributos.vida,
-                                "energia": character.atributos.energia,
-                                "forca": character.atributos.forca,
-                                "inteligencia": character.atributos.inteligencia
-                            }
-                        elif isinstance(character.atributos, dict):
-                            atributos_data = {
-                                "vida": character.atributos.get('vida', 20),
-                                "energia": character.atributos.get('energia', 20),
-                                "forca": character.atributos.get('forca', 10),
-                                "inteligencia": character.atributos.get('inteligencia', 10)
-                            }
-                    
-                    character_context = {
-                        "nome": character.name,
-                        "raca": character.raca,
-                        "classe": character.classe,
-                        "descricao": character.descricao,
-                        "atributos": atributos_data,
-                        "_id": request.character_id
-                    }
-                    logger.info(f"Contexto do personagem: {character.name} ({character.raca} {character.classe})")
-            except Exception as char_error:
-                logger.error(f"Erro ao carregar personagem: {char_error}")
-        
-        history = []
-        if request.conversation_history:
-            history = [
-                {"role": msg.role, "content": msg.content}
-                for msg in request.conversation_history
-            ]
+                set_campaign_ctx(campaign_id, current_user_id, campaign_context, active_campaign.last_played_at)
+            
+            current_chapter = campaign_context["current_chapter"]
+            logger.info(f"Contexto da campanha: {campaign_context['title']} - Capítulo {current_chapter} - Interação {request.interaction_count}/10")
+    except Exception as campaign_error:
+        logger.error(f"Erro ao carregar campanha ativa: {campaign_error}")
+    
+    if request.character_id:
+        try:
+            character = await character_service.repository.get_by_id(
+                request.character_id, current_user_id, projection=_CHARACTER_PROJECTION
+            )
+            if character:
+                char = character.model_dump(include=_CHARACTER_CONTEXT_FIELDS)
+                atributos = char["atributos"]
+                
+                character_context = {
+                    "nome": char["name"],
+                    "raca": char["raca"],
+                    "classe": char["classe"],
+                    "descricao": char["descricao"],
+                    "atributos": {
+                        attr: atributos.get(attr, default)
+                        for attr, default in _ATRIBUTOS_DEFAULTS.items()
+                    } if atributos else {},
+                    "_id": request.character_id
+                }
+                logger.info(f"Contexto do personagem: {char['name']} ({char['raca']} {char['classe']})")
+        except Exception as char_error:
+            logger.error(f"Erro ao carregar personagem: {char_error}")
+    
+    return campaign_context, character_context, campaign_id, current_chapter
+
+def _chat_history(request: LLMChatRequest) -> list:
+    """Histórico da conversa como lista de dicts para o prompt"""
+    if request.conversation_history:
+        return CHAT_HISTORY_ADAPTER.dump_python(request.conversation_history)
+    return []
+
+async def _build_chat_response(
+    result: Dict[str, Any],
+    request: LLMChatRequest,
+    llm_service: LLMService,
+    character_service: CharacterService,
+    campaign_id: Optional[str],
+    current_chapter: int,
+    current_user_id: str
+) -> LLMChatResponse:
+    """Processa a entrega de recompensa e monta a resposta final do chat"""
+    result_get = result.get
+    reward_delivered = None
+    if request.interaction_count >= 8 and request.character_id and campaign_id and result_get("success"):
+        try:
+            logger.info(f"Tentando detectar recompensa para interação {request.interaction_count}")
+            
+            reward_delivered = await llm_service.process_reward_delivery(
+                llm_response=result_get("response", ""),
+                interaction_count=request.interaction_count,
+                chapter=current_chapter,
+                campaign_id=campaign_id,
+                character_repo=character_service.repository,
+                character_id=request.character_id,
+                user_id=current_user_id
+            )
+            
+            if reward_delivered:
+                logger.info(f"Recompensa '{reward_delivered['name']}' confirmada!")
+                
+        except Exception as reward_error:
+            logger.error(f"Erro ao processar recompensa: {reward_error}", exc_info=True)
+
+    contextual_actions = result_get("contextual_actions") or []
+
+    progression_info = result_get("progression")
+    if progression_info and reward_delivered:
+        progression_info["reward_delivered"] = {
+            "name": reward_delivered["name"],
+            "description": reward_delivered["description"],
+            "type": reward_delivered["type"]
+        }
+    
+    # as ações já chegam validadas do LLMService; só a progressão (dict) precisa de validação
+    return LLMChatResponse.model_construct(
+        success=result["success"],
+        response=result_get("response"),
+        contextual_actions=contextual_actions,
+        error=result_get("error"),
+        usage=result_get("usage"),
+        progression=ProgressionInfo.model_validate(progression_info) if progression_info else None
+    )
+
+@router.post(
+    "/chat",
+    response_model=LLMChatResponse,
+    summary="Chat com LLM com progressão",
+    openapi_extra=_CHAT_REQUEST_OPENAPI
+)
+async def chat_with_llm(
+    request: LLMChatRequest = Depends(parse_chat_request),
+    llm_service: LLMService = Depends(get_llm_service),
+    character_service: CharacterService = Depends(get_character_service),
+    campaign_service: CampaignService = Depends(get_campaign_service),
+    current_user_id: str = Depends(get_current_user)
+):
+    """
+    Envia mensagem para a LLM com sistema de progressão narrativa (10 interações)
+    e detecção automática de recompensas
+    """
+    try:
+        campaign_context, character_context, campaign_id, current_chapter = await _load_chat_context(
+            request, current_user_id, campaign_service, character_service
+        )
 
         result = await llm_service.chat_with_llm(
             message=request.message,
             character_context=character_context,
             campaign_context=campaign_context,
-            conversation_history=history,
+            conversation_history=_chat_history(request),
             generate_actions=request.generate_actions,
             interaction_count=request.interaction_count
         )
         
-        reward_delivered = None
-        if (result.get("success") and 
-            request.character_id and 
-            campaign_id and 
-            request.interaction_count >= 8):
-            
-            try:
-                from app.repositories.character_repo import CharacterRepository
-                
-                logger.info(f"Tentando detectar recompensa para interação {request.interaction_count}")
-                
-                character_repo = CharacterRepository(db)
-                
-                reward_delivered = await llm_service.process_reward_delivery(
-                    llm_response=result.get("response", ""),
-                    interaction_count=request.interaction_count,
-                    chapter=current_chapter,
-                    campaign_id=campaign_id,
-                    character_repo=character_repo,
-                    character_id=request.character_id,
-                    user_id=current_user_id
-                )
-                
-                if reward_delivered:
-                    logger.info(f"Recompensa '{reward_delivered['name']}' confirmada!")
-                    
-            except Exception as reward_error:
-                logger.error(f"Erro ao processar recompensa: {reward_error}", exc_info=True)
-
-        contextual_actions = []
-        if result.get("contextual_actions"):
-            for action in result["contextual_actions"]:
-                contextual_actions.append(ContextualAction(**action))
-
-        progression_info = result.get("progression")
-        if progression_info and reward_delivered:
-            progression_info["reward_delivered"] = {
-                "name": reward_delivered["name"],
-                "description": reward_delivered["description"],
-                "type": reward_delivered["type"]
-            }
-        
-        return LLMChatResponse(
-            success=result["success"],
-            response=result.get("response"),
-            contextual_actions=contextual_actions,
-            error=result.get("error"),
-            usage=result.get("usage"),
-            progression=progression_info
+        chat_response = await _build_chat_response(
+            result, request, llm_service, character_service,
+            campaign_id, current_chapter, current_user_id
         )
+        return Response(content=chat_response.model_dump_json(), media_type="application/json")
                     
     except Exception as e:
         logger.error(f"Erro no chat LLM: {str(e)}")
@@ -196,6 +260,60 @@ async def chat_with_llm(
             detail=f"Erro interno no chat: {str(e)}"
         )
 
+@router.post(
+    "/chat/stream",
+    response_class=StreamingResponse,
+    summary="Chat com LLM em streaming (SSE)",
+    openapi_extra=_CHAT_REQUEST_OPENAPI
+)
+async def chat_with_llm_stream(
+    request: LLMChatRequest = Depends(parse_chat_request),
+    llm_service: LLMService = Depends(get_llm_service),
+    character_service: CharacterService = Depends(get_character_service),
+    campaign_service: CampaignService = Depends(get_campaign_service),
+    current_user_id: str = Depends(get_current_user)
+):
+    """
+    Mesmo fluxo de /chat, mas em Server-Sent Events: eventos `delta` com o texto bruto
+    conforme é gerado e um evento `done` final com o LLMChatResponse completo
+    (resposta limpa, ações, progressão e recompensa)
+    """
+    try:
+        campaign_context, character_context, campaign_id, current_chapter = await _load_chat_context(
+            request, current_user_id, campaign_service, character_service
+        )
+    except Exception as e:
+        logger.error(f"Erro no chat LLM (stream): {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro interno no chat: {str(e)}"
+        )
+
+    async def events():
+        async for kind, payload in llm_service.chat_with_llm_stream(
+            message=request.message,
+            character_context=character_context,
+            campaign_context=campaign_context,
+            conversation_history=_chat_history(request),
+            generate_actions=request.generate_actions,
+            interaction_count=request.interaction_count
+        ):
+            if kind == "delta":
+                yield b"event: delta\ndata: " + orjson.dumps({"content": payload}) + b"\n\n"
+                continue
+            try:
+                chat_response = await _build_chat_response(
+                    payload, request, llm_service, character_service,
+                    campaign_id, current_chapter, current_user_id
+                )
+                data = chat_response.model_dump_json().encode()
+            except Exception as e:
+                logger.error(f"Erro ao finalizar chat em streaming: {str(e)}")
+                data = orjson.dumps({"success": False, "error": f"Erro interno no chat: {str(e)}"})
+            yield b"event: done\ndata: " + data + b"\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=_SSE_HEADERS)
+
 @router.post("/reset-progression", response_model=ProgressionResetResponse, summary="Resetar progressão do capítulo")
 async def reset_chapter_progression(
     campaign_service: CampaignService = Depends(get_campaign_service),
@@ -218,7 +336,7 @@ async def reset_chapter_progression(
             detail=f"Erro ao resetar progressão: {str(e)}"
         )
 
-@router.get("/chroma/campaign/{campaign_id}/history", summary="Histórico de narrativas da campanha")
+@router.get("/chroma/campaign/{campaign_id}/history", response_class=ORJSONResponse, summary="Histórico de narrativas da campanha")
 async def get_campaign_narrative_history(
     campaign_id: str,
     chapter: int = None,
@@ -247,7 +365,7 @@ async def get_campaign_narrative_history(
             detail=f"Erro ao buscar histórico: {str(e)}"
         )
 
-@router.get("/chroma/campaign/{campaign_id}/chapter/{chapter}/summary", summary="Resumo do capítulo")
+@router.get("/chroma/campaign/{campaign_id}/chapter/{chapter}/summary", response_class=ORJSONResponse, summary="Resumo do capítulo")
 async def get_chapter_summary(
     campaign_id: str,
     chapter: int,
@@ -272,7 +390,7 @@ async def get_chapter_summary(
             detail=f"Erro ao gerar resumo: {str(e)}"
         )
 
-@router.post("/chroma/search", summary="Busca vetorial de narrativas")
+@router.post("/chroma/search", response_class=ORJSONResponse, summary="Busca vetorial de narrativas")
 async def search_narratives(
     query: str,
     campaign_id: str = None,
@@ -302,7 +420,7 @@ async def search_narratives(
             detail=f"Erro na busca vetorial: {str(e)}"
         )
 
-@router.delete("/chroma/campaign/{campaign_id}", summary="Deletar narrativas da campanha")
+@router.delete("/chroma/campaign/{campaign_id}", response_class=ORJSONResponse, summary="Deletar narrativas da campanha")
 async def delete_campaign_narratives(
     campaign_id: str,
     vector_store: VectorStoreService = Depends(get_vector_store_service),
@@ -328,7 +446,7 @@ async def delete_campaign_narratives(
             detail=f"Erro ao deletar narrativas: {str(e)}"
         )
     
-@router.get("/chroma/campaign/{campaign_id}/full-context", summary="Contexto completo da campanha para retomada")
+@router.get("/chroma/campaign/{campaign_id}/full-context", response_class=ORJSONResponse, summary="Contexto completo da campanha para retomada")
 async def get_full_campaign_context(
     campaign_id: str,
     vector_store: VectorStoreService = Depends(get_vector_store_service),
@@ -344,8 +462,6 @@ async def get_full_campaign_context(
             chapter=None,
             limit=100
         )
-
-        history.sort(key=lambda x: x['metadata'].get('timestamp', ''))
         
         conversation_history = []
         for item in history:
@@ -383,7 +499,7 @@ async def get_full_campaign_context(
             detail=f"Erro ao buscar contexto: {str(e)}"
         )
 
-@router.delete("/chroma/campaign/{campaign_id}/current-only", summary="Limpar apenas campaign_current")
+@router.delete("/chroma/campaign/{campaign_id}/current-only", response_class=ORJSONResponse, summary="Limpar apenas campaign_current")
 async def clear_current_campaign_only(
     campaign_id: str,
     vector_store: VectorStoreService = Depends(get_vector_store_service),
@@ -1,17 +1,42 @@
 import logging
+from datetime import datetime, timezone
 
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from pymongo import MongoClient
 from pymongo.database import Database
 
-from app.config import MONGO_DB, MONGO_URI
+from app.config import (
+    MONGO_DB,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_URI,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+)
 
 logger = logging.getLogger(__name__)
 
+# pool do cliente assíncrono: conexões mantidas aquecidas e espera limitada sob rajadas
+_ASYNC_POOL_OPTIONS = {
+    "maxPoolSize": MONGO_MAX_POOL_SIZE,
+    "minPoolSize": MONGO_MIN_POOL_SIZE,
+    "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+    "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    "retryWrites": True,
+}
+
+
+def utc_now() -> datetime:
+    """Instante atual em UTC (aware) na precisão do BSON (milissegundos), igual ao que o banco devolve"""
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
 
 class MongoDB:
     _instance = None
     _client = None
     _database = None
+    _async_client = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -25,7 +50,7 @@ class MongoDB:
     def connect(self):
         """Conecta ao MongoDB"""
         try:
-            self._client = MongoClient(MONGO_URI)
+            self._client = MongoClient(MONGO_URI, tz_aware=True)
             self._database = self._client[MONGO_DB]
             self._client.admin.command("ping")
             logger.info(f"Conectado ao MongoDB: {MONGO_DB}")
@@ -41,10 +66,19 @@ class MongoDB:
     def database(self) -> Database:
         return self._database
 
+    @property
+    def async_database(self) -> AsyncIOMotorDatabase:
+        """Database assíncrono (Motor), criado sob demanda dentro do event loop"""
+        if self._async_client is None:
+            self._async_client = AsyncIOMotorClient(MONGO_URI, tz_aware=True, **_ASYNC_POOL_OPTIONS)
+        return self._async_client[MONGO_DB]
+
     def close(self):
         """Fecha a conexão"""
         if self._client:
             self._client.close()
+        if self._async_client:
+            self._async_client.close()
 
 
 mongodb = MongoDB()
@@ -55,6 +89,11 @@ def get_database() -> Database:
     return mongodb.database
 
 
+def get_async_database() -> AsyncIOMotorDatabase:
+    """Retorna a instância do database assíncrono (Motor)"""
+    return mongodb.async_database
+
+
 def get_db() -> Database:
     """Função compatível com main.py existente"""
     return mongodb.database
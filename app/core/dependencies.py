@@ -1,15 +1,34 @@
+from functools import lru_cache
 from typing import Generator
-from app.core.database import get_db
+from app.core.database import get_async_database
+from app.repositories.character_repo import CharacterRepository
+from app.repositories.user_repo import UserRepository
+from app.services.auth_service import AuthService
 from app.services.campaign_service import CampaignService
 from app.services.vector_store_service import VectorStoreService
-from fastapi import Depends
+from fastapi import Depends, Request
 
-def get_vector_store_service() -> VectorStoreService:
-    """Retorna instância do VectorStoreService"""
-    return VectorStoreService()
+def get_vector_store_service(request: Request) -> VectorStoreService:
+    """Retorna a instância compartilhada do VectorStoreService (criada no startup)"""
+    return request.app.state.vector_store
+
+@lru_cache(maxsize=1)
+def get_character_repository() -> CharacterRepository:
+    """Retorna o CharacterRepository compartilhado pelo processo"""
+    return CharacterRepository(get_async_database())
+
+@lru_cache(maxsize=1)
+def get_user_repository() -> UserRepository:
+    """Retorna o UserRepository compartilhado pelo processo"""
+    return UserRepository()
+
+@lru_cache(maxsize=1)
+def get_auth_service() -> AuthService:
+    """Retorna o AuthService compartilhado pelo processo, com o repositório de usuários injetado"""
+    return AuthService(get_user_repository())
 
 def get_campaign_service(
-    db = Depends(get_db),
+    db = Depends(get_async_database),
     vector_store: VectorStoreService = Depends(get_vector_store_service)
 ) -> CampaignService:
     """Retorna instância do CampaignService com dependências injetadas"""
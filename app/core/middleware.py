@@ -1,19 +1,17 @@
-import os
-
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.config import CORS_ORIGINS
 
-def setup_middlewares(app):
-    env_origins = os.getenv("CORS_ORIGINS")
-    if env_origins:
-        origins = [o.strip() for o in env_origins.split(",") if o.strip()]
-    else:
-        origins = ["http://localhost:4200", "http://127.0.0.1:4200"]
+_ORIGINS = tuple(o.strip() for o in CORS_ORIGINS.split(",") if o.strip())
+_METHODS = ("GET", "POST", "PUT", "DELETE", "OPTIONS")
+_HEADERS = ("authorization", "content-type")
 
+
+def setup_middlewares(app):
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=origins,
+        allow_origins=_ORIGINS,
         allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+        allow_methods=_METHODS,
+        allow_headers=_HEADERS,
     )
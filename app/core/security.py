@@ -1,6 +1,9 @@
+import asyncio
 import jwt
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 import secrets
@@ -11,16 +14,28 @@ SECRET_KEY = secrets.token_urlsafe(32)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440 
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+_ACCESS_TOKEN_EXPIRE_DELTA = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+_REFRESH_TOKEN_EXPIRE_DELTA = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
 
+# Argon2id para novos hashes; bcrypt mantido apenas para verificar hashes legados
 pwd_context = CryptContext(
-    schemes=["bcrypt"], 
+    schemes=["argon2", "bcrypt"], 
     deprecated="auto",
+    argon2__time_cost=3,
+    argon2__memory_cost=46 * 1024,
+    argon2__parallelism=1,
     bcrypt__rounds=12 
 )
 
+# argon2-cffi libera o GIL durante o hash: threads dedicadas paralelizam entre os núcleos
+_PWD_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="pwd-hash")
+
 class SecurityService:
     """Serviço de segurança com validações avançadas"""
     
+    _LETTERS_RE = re.compile(r"[a-zA-Z]")
+    _DIGITS_RE = re.compile(r"\d")
+    
     @staticmethod
     def validate_password_strength(password: str) -> bool:
         """Valida força da senha"""
@@ -30,8 +45,8 @@ class SecurityService:
                 detail="Senha deve ter pelo menos 6 caracteres"
             )
         
-        has_letters = bool(re.search(r"[a-zA-Z]", password))
-        has_numbers = bool(re.search(r"\d", password))
+        has_letters = SecurityService._LETTERS_RE.search(password) is not None
+        has_numbers = SecurityService._DIGITS_RE.search(password) is not None
         
         if not (has_letters or has_numbers):
             raise HTTPException(
@@ -78,6 +93,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica se a senha está correta"""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verifica a senha e retorna um novo hash quando o atual usa esquema/parâmetros antigos"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """Gera o hash da senha no pool dedicado, fora do event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_PWD_POOL, get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Executa verify_and_update_password no pool dedicado, fora do event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_PWD_POOL, verify_and_update_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Cria token JWT com expiração"""
     to_encode = data.copy()
@@ -85,7 +114,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.now(timezone.utc) + _ACCESS_TOKEN_EXPIRE_DELTA
     
     to_encode.update({
         "exp": expire,
@@ -98,7 +127,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def create_refresh_token(user_id: str) -> str:
     """Cria refresh token de longa duração"""
-    expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    expire = datetime.now(timezone.utc) + _REFRESH_TOKEN_EXPIRE_DELTA
     
     to_encode = {
         "sub": user_id,
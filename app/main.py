@@ -1,16 +1,52 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache, wraps
+
 from fastapi import FastAPI, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from app.api.auth import router as auth_router
 from app.api.characters import router as chars_router
 from app.api.campaigns import router as campaigns_router
 from app.api.llm import router as llm_router
-from app.core.database import get_db, mongodb
+from app.config import OPENAI_API_KEY
+from app.core.database import get_async_database, mongodb
+from app.core.dependencies import get_character_repository, get_user_repository
 from app.core.middleware import setup_middlewares
+from app.services.campaign_service import CampaignService
+from app.services.llm_service import close_http_client
+from app.services.vector_store_service import VectorStoreService
+
+logging.basicConfig(level=logging.INFO)
+
+_PING_TIMEOUT = 2.0
+_PROBE_TTL = 5.0
+_LIVENESS_RESPONSE = ORJSONResponse({"status": "alive"})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicializa recursos compartilhados antes de aceitar requisições"""
+    await get_character_repository().ensure_indexes()
+    await get_user_repository().ensure_indexes()
+    campaign_service = CampaignService(get_async_database())
+    await campaign_service.ensure_indexes()
+    await campaign_service.ensure_base_campaigns()
+    vector_store = VectorStoreService()
+    await asyncio.to_thread(vector_store.warmup)
+    app.state.vector_store = vector_store
+    yield
+    await close_http_client()
+    mongodb.close()
+
 
 app = FastAPI(
     title="RPG Chromance API — Cyberpunk",
     version="0.1.0",
     description="Contrato inicial (Auth, Personagem, Campanha, Histórico, Ação e LLM).",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # aplica middlewares (CORS)
@@ -20,4 +56,91 @@ setup_middlewares(app)
 app.include_router(auth_router)
 app.include_router(chars_router)
 app.include_router(campaigns_router)
-app.include_router(llm_router)
\ No newline at end of file
+app.include_router(llm_router)
+
+
+async def _check_mongo() -> str:
+    """Executa o ping no MongoDB"""
+    await get_async_database().command("ping")
+    return "ok"
+
+
+@lru_cache(maxsize=1)
+def _llm_configured() -> bool:
+    return bool(OPENAI_API_KEY)
+
+
+async def _check_llm() -> str:
+    """Verifica se a chave da LLM está configurada"""
+    return "ok" if _llm_configured() else "not_configured"
+
+
+_HEALTH_CHECKS = (("mongodb", _check_mongo), ("llm", _check_llm))
+
+
+def _probe_cache(endpoint):
+    """Reaproveita a resposta da sonda por _PROBE_TTL segundos (uma só verificação por rajada)"""
+    cached = None
+    checked_at = 0.0
+    refresh_lock = asyncio.Lock()
+
+    def _fresh() -> bool:
+        return cached is not None and time.monotonic() - checked_at < _PROBE_TTL
+
+    @wraps(endpoint)
+    async def wrapper():
+        nonlocal cached, checked_at
+        if _fresh():
+            return cached
+        async with refresh_lock:
+            if not _fresh():
+                cached = await endpoint()
+                checked_at = time.monotonic()
+        return cached
+
+    return wrapper
+
+
+@app.get("/liveness", tags=["Health"], summary="Processo ativo")
+async def liveness():
+    """Não depende de serviços externos: responde enquanto o processo estiver vivo"""
+    return _LIVENESS_RESPONSE
+
+
+@app.get("/readiness", tags=["Health"], summary="Pronto para receber tráfego")
+@_probe_cache
+async def readiness():
+    """Verifica se o MongoDB responde dentro do tempo limite"""
+    try:
+        await asyncio.wait_for(_check_mongo(), _PING_TIMEOUT)
+    except Exception:
+        return ORJSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "not_ready", "mongodb": "unavailable"},
+        )
+    return {"status": "ready"}
+
+
+@app.get("/health", tags=["Health"], summary="Saúde geral da API")
+@_probe_cache
+async def health():
+    """Estado do MongoDB e da configuração da LLM (verificações em paralelo)"""
+    results = await asyncio.gather(
+        *(asyncio.wait_for(check(), _PING_TIMEOUT) for _, check in _HEALTH_CHECKS),
+        return_exceptions=True,
+    )
+
+    body = {}
+    for (name, _), result in zip(_HEALTH_CHECKS, results):
+        if isinstance(result, TimeoutError):
+            body[name] = "timeout"
+        elif isinstance(result, Exception):
+            body[name] = "error"
+        else:
+            body[name] = result
+
+    healthy = body["mongodb"] == "ok"
+    body = {"status": "ok" if healthy else "degraded", **body}
+    if not healthy:
+        return ORJSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=body)
+    return body
@@ -1,6 +1,9 @@
 from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_serializer
+
+from app.core.database import utc_now
+from app.models.object_id import PyObjectId
 
 class Reward(BaseModel):
     type: str
@@ -8,14 +11,9 @@ class Reward(BaseModel):
     icon: str
 
 class Campaign(BaseModel):
-    model_config = ConfigDict(
-        populate_by_name=True,
-        json_encoders={
-            datetime: lambda v: v.isoformat() if v else None
-        }
-    )
+    model_config = ConfigDict(populate_by_name=True)
     
-    id: Optional[str] = None 
+    id: Optional[PyObjectId] = None
     campaign_id: str
     title: str
     chapter: int
@@ -33,8 +31,16 @@ class Campaign(BaseModel):
     current_chapter: Optional[int] = None
     chapters_completed: List[int] = Field(default_factory=list)
 
-    created_at: datetime = Field(default_factory=datetime.now)
-    updated_at: datetime = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
-    cancelled_at: Optional[datetime] = None
\ No newline at end of file
+    cancelled_at: Optional[datetime] = None
+
+    @field_serializer(
+        "created_at", "updated_at", "started_at", "completed_at", "cancelled_at",
+        when_used="json-unless-none"
+    )
+    def serialize_datetime(self, value: datetime) -> str:
+        """Serializa datetime para ISO format"""
+        return value.isoformat()
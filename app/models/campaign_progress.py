@@ -1,17 +1,15 @@
 from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_serializer
+
+from app.core.database import utc_now
+from app.models.object_id import PyObjectId
 
 class CampaignProgress(BaseModel):
     """Model para armazenar o progresso de cada usuário em uma campanha"""
-    model_config = ConfigDict(
-        populate_by_name=True,
-        json_encoders={
-            datetime: lambda v: v.isoformat() if v else None
-        }
-    )
+    model_config = ConfigDict(populate_by_name=True)
     
-    id: Optional[str] = Field(default=None, alias="_id")
+    id: Optional[PyObjectId] = Field(default=None, alias="_id")
     user_id: str
     campaign_id: str
     status: str = "in_progress"
@@ -20,11 +18,13 @@ class CampaignProgress(BaseModel):
     current_chapter: int = 1
     chapters_completed: List[int] = Field(default_factory=list)
     items_collected: List[str] = Field(default_factory=list)
-    started_at: datetime = Field(default_factory=datetime.now)
-    last_played_at: datetime = Field(default_factory=datetime.now)
+    started_at: datetime = Field(default_factory=utc_now)
+    last_played_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
\ No newline at end of file
+
+    @field_serializer(
+        "started_at", "last_played_at", "completed_at", when_used="json-unless-none"
+    )
+    def serialize_datetime(self, value: datetime) -> str:
+        """Serializa datetime para ISO format"""
+        return value.isoformat()
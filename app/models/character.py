@@ -1,8 +1,11 @@
 from datetime import datetime
 from typing import Optional, Dict, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_serializer
 from bson import ObjectId
 
+from app.core.database import utc_now
+from app.models.object_id import PyObjectId
+
 class InventoryItem(BaseModel):
     """Item do inventário"""
     id: str
@@ -11,12 +14,12 @@ class InventoryItem(BaseModel):
     type: str 
     chapter: int
     campaign_id: str
-    obtained_at: datetime = Field(default_factory=datetime.utcnow)
+    obtained_at: datetime = Field(default_factory=utc_now)
     metadata: Optional[Dict] = {}
 
 class CharacterModel(BaseModel):
     """Modelo de dados do personagem no MongoDB"""
-    id: Optional[str] = Field(None, alias="_id")
+    id: Optional[PyObjectId] = Field(None, alias="_id")
     name: str
     raca: str
     classe: str
@@ -26,42 +29,35 @@ class CharacterModel(BaseModel):
     imageUrl: str = "assets/images/default-avatar.png"
     user_id: Optional[str] = None
     is_selected: bool = False
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
     active: bool = True
 
-    class Config:
-        populate_by_name = True
-        json_encoders = {
-            ObjectId: str,
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(populate_by_name=True)
+
+    @field_serializer("created_at", when_used="json")
+    def serialize_datetime(self, value: datetime) -> str:
+        """Serializa datetime para ISO format"""
+        return value.isoformat()
 
     def to_mongo(self):
         """Converte para formato MongoDB"""
-        data = self.dict(by_alias=True, exclude_none=True)
+        data = self.model_dump(by_alias=True, exclude_none=True)
         if "_id" in data and data["_id"]:
             data["_id"] = ObjectId(data["_id"])
         elif "_id" in data:
             data.pop("_id")
         
-        if "inventory" in data:
-            data["inventory"] = [
-                item.dict() if hasattr(item, 'dict') else item 
-                for item in data["inventory"]
-            ]
-        
         return data
 
     @classmethod
     def from_mongo(cls, data: dict):
         """Cria instância a partir de documento MongoDB"""
-        if data and "_id" in data:
-            data["_id"] = str(data["_id"])
-        
         if "inventory" in data and data["inventory"]:
             data["inventory"] = [
                 InventoryItem(**item) if isinstance(item, dict) else item 
                 for item in data["inventory"]
             ]
         
-        return cls(**data)
\ No newline at end of file
+        return cls(**data)
+
+CHARACTER_LIST_ADAPTER = TypeAdapter(List[CharacterModel])
@@ -0,0 +1,23 @@
+import re
+from typing import Annotated, Any, Optional
+
+from bson import ObjectId
+from pydantic import BeforeValidator
+
+_OID_RE = re.compile(r"^[0-9a-fA-F]{24}$")
+
+
+def _validate_oid(value: Any) -> str:
+    """Aceita ObjectId ou string hexadecimal de 24 caracteres e retorna a string"""
+    oid = str(value)
+    if not _OID_RE.match(oid):
+        raise ValueError("ObjectId inválido")
+    return oid
+
+
+def to_object_id(value: str) -> Optional[ObjectId]:
+    """Converte a string em ObjectId, ou retorna None se não for um id válido"""
+    return ObjectId(value) if isinstance(value, str) and _OID_RE.match(value) else None
+
+
+PyObjectId = Annotated[str, BeforeValidator(_validate_oid)]
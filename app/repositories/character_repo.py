@@ -1,130 +1,227 @@
-from typing import List, Optional
+import logging
+from typing import AsyncIterator, List, Optional, Tuple
 from datetime import datetime
 from bson import ObjectId
-from pymongo.database import Database
-from pymongo.errors import DuplicateKeyError
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
 
-from app.models.character import CharacterModel
+from app.core.database import utc_now
+from app.models.character import CHARACTER_LIST_ADAPTER, CharacterModel
+from app.models.object_id import to_object_id
+
+logger = logging.getLogger(__name__)
+
+_READ_ERRORS = (InvalidId, PyMongoError)
+# igualdade (user_id, active) -> ordenação/keyset (created_at, _id)
+_INDEXES = [
+    IndexModel([("user_id", 1), ("active", 1), ("created_at", -1), ("_id", -1)]),
+    IndexModel([("user_id", 1), ("active", 1), ("is_selected", 1)]),
+]
+_WITHOUT_INVENTORY = {"inventory": 0}
+_TOUCH_UPDATED_AT = {"updated_at": True}
+_UNSELECT_UPDATE = {"$set": {"is_selected": False}, "$currentDate": _TOUCH_UPDATED_AT}
+_LIST_SORT = [("created_at", -1), ("_id", -1)]
 
 
 class CharacterRepository:
     """Repositório para operações de personagens no MongoDB"""
     
-    def __init__(self, db: Database):
+    _indexes_ensured = False
+    
+    def __init__(self, db: AsyncIOMotorDatabase):
         self.collection = db.characters
-        self._create_indexes()
     
-    def _create_indexes(self):
-        """Cria índices para otimizar queries"""
+    async def ensure_indexes(self):
+        """Cria índices para otimizar queries (executado uma vez no startup)"""
+        if CharacterRepository._indexes_ensured:
+            return
         try:
-            self.collection.create_index("user_id")
-            self.collection.create_index("active")
-            self.collection.create_index("is_selected") 
-            self.collection.create_index([("user_id", 1), ("active", -1)])
-            self.collection.create_index([("user_id", 1), ("is_selected", -1)]) 
-        except Exception as e:
-            print(f"Erro ao criar índices: {e}")
+            await self.collection.create_indexes(_INDEXES)
+            CharacterRepository._indexes_ensured = True
+        except Exception:
+            logger.exception("Erro ao criar índices")
     
     async def create(self, character_data: dict, user_id: str = None) -> CharacterModel:
-        """Cria um novo personagem no banco"""
+        """Cria um novo personagem no banco a partir dos campos já validados"""
         try:
             character_data["user_id"] = user_id
-            character_data["created_at"] = datetime.utcnow()
+            character_data["created_at"] = utc_now()
             character_data["active"] = True
             character_data["is_selected"] = False
             character_data["inventory"] = []
             
-            if hasattr(character_data.get("atributos"), "dict"):
-                character_data["atributos"] = character_data["atributos"].dict()
-            
-            result = self.collection.insert_one(character_data)
+            await self.collection.insert_one(character_data)
             
-            created_character = self.collection.find_one({"_id": result.inserted_id})
-            
-            return CharacterModel.from_mongo(created_character)
+            return CharacterModel.from_mongo(character_data)
             
         except DuplicateKeyError:
             raise ValueError("Personagem já existe")
         except Exception as e:
             raise Exception(f"Erro ao criar personagem: {str(e)}")
     
-    async def get_by_id(self, character_id: str, user_id: str = None) -> Optional[CharacterModel]:
-        """Busca um personagem por ID"""
+    async def get_by_id(
+        self,
+        character_id: str,
+        user_id: str = None,
+        projection: Optional[dict] = None
+    ) -> Optional[CharacterModel]:
+        """Busca um personagem por ID (opcionalmente apenas os campos da projeção)"""
+        oid = to_object_id(character_id)
+        if oid is None:
+            return None
         try:
-            query = {"_id": ObjectId(character_id), "active": True}
+            query = {"_id": oid, "active": True}
             if user_id:
                 query["user_id"] = user_id
             
-            character = self.collection.find_one(query)
+            character = await self.collection.find_one(query, projection)
             
             if character:
                 return CharacterModel.from_mongo(character)
             return None
             
-        except Exception as e:
-            print(f"Erro ao buscar personagem: {e}")
+        except _READ_ERRORS:
+            logger.exception("Erro ao buscar personagem")
             return None
     
-    async def get_all(self, user_id: str = None, skip: int = 0, limit: int = 10) -> List[CharacterModel]:
-        """Lista todos os personagens (com paginação)"""
+    def _list_cursor(
+        self,
+        user_id: Optional[str],
+        skip: int,
+        limit: int,
+        after: Optional[datetime],
+        after_id: Optional[str]
+    ):
+        """Monta o cursor da listagem: keyset quando `after` é informado, senão skip/limit"""
+        query = {"active": True}
+        if user_id:
+            query["user_id"] = user_id
+        if after is not None:
+            query["$or"] = [
+                {"created_at": {"$lt": after}},
+                {"created_at": after, "_id": {"$lt": ObjectId(after_id)}}
+            ]
+            skip = 0
+        
+        return self.collection.find(query).sort(_LIST_SORT).skip(skip).limit(limit)
+    
+    async def get_all(
+        self,
+        user_id: str = None,
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[datetime] = None,
+        after_id: Optional[str] = None
+    ) -> List[CharacterModel]:
+        """Lista os personagens (paginação por skip ou por keyset a partir de after/after_id)"""
         try:
-            query = {"active": True}
-            if user_id:
-                query["user_id"] = user_id
+            cursor = self._list_cursor(user_id, skip, limit, after, after_id)
+            rows = await cursor.to_list(length=limit or None)
             
-            cursor = self.collection.find(query).skip(skip).limit(limit).sort("created_at", -1)
+            return CHARACTER_LIST_ADAPTER.validate_python(rows)
             
-            characters = []
-            for doc in cursor:
-                characters.append(CharacterModel.from_mongo(doc))
-            
-            return characters
-            
-        except Exception as e:
-            print(f"Erro ao listar personagens: {e}")
+        except _READ_ERRORS:
+            logger.exception("Erro ao listar personagens")
             return []
     
+    async def list_paginated(
+        self,
+        user_id: str = None,
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[datetime] = None,
+        after_id: Optional[str] = None
+    ) -> Tuple[List[CharacterModel], int]:
+        """Retorna a página de personagens e o total do usuário em uma única agregação ($facet)"""
+        query = {"active": True}
+        if user_id:
+            query["user_id"] = user_id
+        
+        page_stages = []
+        if after is not None:
+            page_stages.append({"$match": {"$or": [
+                {"created_at": {"$lt": after}},
+                {"created_at": after, "_id": {"$lt": ObjectId(after_id)}}
+            ]}})
+            skip = 0
+        if skip:
+            page_stages.append({"$skip": skip})
+        page_stages.append({"$limit": limit})
+        
+        try:
+            cursor = self.collection.aggregate([
+                {"$match": query},
+                {"$sort": dict(_LIST_SORT)},
+                {"$facet": {"data": page_stages, "total": [{"$count": "n"}]}}
+            ])
+            result = await cursor.to_list(length=1)
+            facet = result[0] if result else {}
+            
+            total = facet.get("total") or [{"n": 0}]
+            return CHARACTER_LIST_ADAPTER.validate_python(facet.get("data", [])), total[0]["n"]
+            
+        except _READ_ERRORS:
+            logger.exception("Erro ao listar personagens")
+            return [], 0
+    
+    async def iter_all(
+        self,
+        user_id: str = None,
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[datetime] = None,
+        after_id: Optional[str] = None
+    ) -> AsyncIterator[CharacterModel]:
+        """Itera os personagens conforme o cursor entrega os documentos (sem materializar a lista)"""
+        async for doc in self._list_cursor(user_id, skip, limit, after, after_id):
+            yield CharacterModel.model_validate(doc)
+    
     async def update(self, character_id: str, update_data: dict, user_id: str = None) -> Optional[CharacterModel]:
-        """Atualiza um personagem"""
+        """Atualiza um personagem (update_data já deve vir sem valores None)"""
+        oid = to_object_id(character_id)
+        if oid is None:
+            return None
         try:
-            query = {"_id": ObjectId(character_id), "active": True}
+            query = {"_id": oid, "active": True}
             if user_id:
                 query["user_id"] = user_id
             
-            update_data["updated_at"] = datetime.utcnow()
-            
-            if "atributos" in update_data and hasattr(update_data["atributos"], "dict"):
-                update_data["atributos"] = update_data["atributos"].dict()
-            
-            update_data = {k: v for k, v in update_data.items() if v is not None}
+            update = {"$currentDate": _TOUCH_UPDATED_AT}
+            if update_data:
+                update["$set"] = update_data
             
-            result = self.collection.find_one_and_update(
+            result = await self.collection.find_one_and_update(
                 query,
-                {"$set": update_data},
-                return_document=True
+                update,
+                return_document=ReturnDocument.AFTER
             )
             
             if result:
                 return CharacterModel.from_mongo(result)
             return None
             
-        except Exception as e:
-            print(f"Erro ao atualizar personagem: {e}")
+        except Exception:
+            logger.exception("Erro ao atualizar personagem")
             return None
     
     async def delete(self, character_id: str, user_id: str = None) -> bool:
         """ Remove o personagem do banco"""
+        oid = to_object_id(character_id)
+        if oid is None:
+            return False
         try:
-            query = {"_id": ObjectId(character_id)}
+            query = {"_id": oid}
             if user_id:
                 query["user_id"] = user_id
             
-            result = self.collection.delete_one(query)
+            result = await self.collection.delete_one(query)
             
             return result.deleted_count > 0
             
-        except Exception as e:
-            print(f"Erro ao deletar personagem: {e}")
+        except Exception:
+            logger.exception("Erro ao deletar personagem")
             return False
     
     async def count(self, user_id: str = None) -> int:
@@ -134,9 +231,10 @@ class CharacterRepository:
             if user_id:
                 query["user_id"] = user_id
             
-            return self.collection.count_documents(query)
+            return await self.collection.count_documents(query)
             
-        except Exception:
+        except PyMongoError:
+            logger.exception("Erro ao contar personagens")
             return 0
 
     async def unselect_all_characters(self, user_id: str = None) -> bool:
@@ -146,49 +244,60 @@ class CharacterRepository:
             if user_id:
                 filter_dict["user_id"] = user_id
                 
-            result = self.collection.update_many(
+            result = await self.collection.update_many(
                 filter_dict,
-                {"$set": {"is_selected": False, "updated_at": datetime.utcnow()}}
+                _UNSELECT_UPDATE
             )
             return True
-        except Exception as e:
-            print(f"Erro ao desmarcar personagens: {e}")
+        except Exception:
+            logger.exception("Erro ao desmarcar personagens")
             return False
 
-    async def get_selected_character(self, user_id: str = None) -> Optional[CharacterModel]:
+    async def get_selected_character(
+        self,
+        user_id: str = None,
+        projection: Optional[dict] = None
+    ) -> Optional[CharacterModel]:
         """Busca o personagem atualmente selecionado do usuário"""
         try:
             filter_dict = {"active": True, "is_selected": True}
             if user_id:
                 filter_dict["user_id"] = user_id
                 
-            document = self.collection.find_one(filter_dict)
+            document = await self.collection.find_one(filter_dict, projection)
             if document:
                 return CharacterModel.from_mongo(document)
             return None
-        except Exception as e:
-            print(f"Erro ao buscar personagem selecionado: {e}")
+        except _READ_ERRORS:
+            logger.exception("Erro ao buscar personagem selecionado")
             return None
 
     async def select_character_by_id(self, character_id: str, user_id: str = None) -> Optional[CharacterModel]:
-        """Seleciona um personagem específico por ID"""
+        """Seleciona um personagem por ID e desmarca os demais do usuário em uma única operação"""
+        target_id = to_object_id(character_id)
+        if target_id is None:
+            return None
         try:
-            query = {"_id": ObjectId(character_id), "active": True}
+            filter_dict = {"active": True}
             if user_id:
-                query["user_id"] = user_id
+                filter_dict["user_id"] = user_id
             
-            result = self.collection.find_one_and_update(
-                query,
-                {"$set": {"is_selected": True, "updated_at": datetime.utcnow()}},
-                return_document=True
+            await self.collection.update_many(
+                {**filter_dict, "$or": [{"is_selected": True}, {"_id": target_id}]},
+                [{"$set": {
+                    "is_selected": {"$eq": ["$_id", target_id]},
+                    "updated_at": "$$NOW"
+                }}]
             )
             
+            result = await self.collection.find_one({**filter_dict, "_id": target_id, "is_selected": True})
+            
             if result:
                 return CharacterModel.from_mongo(result)
             return None
             
-        except Exception as e:
-            print(f"Erro ao selecionar personagem: {e}")
+        except Exception:
+            logger.exception("Erro ao selecionar personagem")
             return None
 
     async def has_selected_character(self, user_id: str = None) -> bool:
@@ -198,10 +307,9 @@ class CharacterRepository:
             if user_id:
                 filter_dict["user_id"] = user_id
                 
-            count = self.collection.count_documents(filter_dict)
-            return count > 0
-        except Exception as e:
-            print(f"Erro ao verificar personagem selecionado: {e}")
+            return bool(await self.collection.find_one(filter_dict, {"_id": 1}))
+        except _READ_ERRORS:
+            logger.exception("Erro ao verificar personagem selecionado")
             return False
 
     async def add_item_to_inventory(
@@ -211,45 +319,50 @@ class CharacterRepository:
         user_id: str = None
     ) -> Optional[CharacterModel]:
         """Adiciona um item ao inventário do personagem (evita duplicatas por capítulo)"""
+        oid = to_object_id(character_id)
+        if oid is None:
+            return None
         try:
-            query = {"_id": ObjectId(character_id), "active": True}
+            query = {"_id": oid, "active": True}
             if user_id:
                 query["user_id"] = user_id
 
-            existing_check = self.collection.find_one({
-                **query,
-                "inventory": {
-                    "$elemMatch": {
-                        "chapter": item.get("chapter"),
-                        "campaign_id": item.get("campaign_id"),
-                        "type": "reward"
-                    }
-                }
-            })
-            
-            if existing_check:
-                print(f"Recompensa do capítulo {item.get('chapter')} já existe no inventário")
-                return CharacterModel.from_mongo(existing_check)
-            
             if "obtained_at" not in item:
-                item["obtained_at"] = datetime.utcnow()
+                item["obtained_at"] = utc_now()
             
-            result = self.collection.find_one_and_update(
-                query,
+            result = await self.collection.find_one_and_update(
+                {
+                    **query,
+                    "inventory": {
+                        "$not": {
+                            "$elemMatch": {
+                                "chapter": item.get("chapter"),
+                                "campaign_id": item.get("campaign_id"),
+                                "type": "reward"
+                            }
+                        }
+                    }
+                },
                 {
                     "$push": {"inventory": item},
-                    "$set": {"updated_at": datetime.utcnow()}
+                    "$currentDate": _TOUCH_UPDATED_AT
                 },
-                return_document=True
+                projection=_WITHOUT_INVENTORY,
+                return_document=ReturnDocument.AFTER
             )
             
             if result:
-                print(f"Item '{item.get('name')}' adicionado ao inventário")
+                logger.info(f"Item '{item.get('name')}' adicionado ao inventário")
                 return CharacterModel.from_mongo(result)
+            
+            existing = await self.collection.find_one(query, _WITHOUT_INVENTORY)
+            if existing:
+                logger.info(f"Recompensa do capítulo {item.get('chapter')} já existe no inventário")
+                return CharacterModel.from_mongo(existing)
             return None
             
-        except Exception as e:
-            print(f"Erro ao adicionar item ao inventário: {e}")
+        except Exception:
+            logger.exception("Erro ao adicionar item ao inventário")
             return None
 
     async def get_inventory(
@@ -258,21 +371,58 @@ class CharacterRepository:
         user_id: str = None
     ) -> List[dict]:
         """Retorna o inventário do personagem"""
+        oid = to_object_id(character_id)
+        if oid is None:
+            return []
         try:
-            query = {"_id": ObjectId(character_id), "active": True}
+            query = {"_id": oid, "active": True}
             if user_id:
                 query["user_id"] = user_id
             
-            character = self.collection.find_one(query, {"inventory": 1})
+            character = await self.collection.find_one(query, {"inventory": 1})
             
             if character:
                 return character.get("inventory", [])
             return []
             
-        except Exception as e:
-            print(f"Erro ao buscar inventário: {e}")
+        except _READ_ERRORS:
+            logger.exception("Erro ao buscar inventário")
             return []
 
+    async def consume_item(
+        self,
+        character_id: str,
+        item_id: str,
+        atributos: dict,
+        user_id: str = None
+    ) -> Optional[CharacterModel]:
+        """Remove um item do inventário e grava os novos atributos em uma única operação"""
+        oid = to_object_id(character_id)
+        if oid is None:
+            return None
+        try:
+            query = {"_id": oid, "active": True, "inventory.id": item_id}
+            if user_id:
+                query["user_id"] = user_id
+            
+            result = await self.collection.find_one_and_update(
+                query,
+                {
+                    "$pull": {"inventory": {"id": item_id}},
+                    "$set": {"atributos": atributos},
+                    "$currentDate": _TOUCH_UPDATED_AT
+                },
+                return_document=ReturnDocument.AFTER
+            )
+            
+            if result:
+                return CharacterModel.from_mongo(result)
+            return None
+            
+        except Exception:
+            logger.exception("Erro ao consumir item")
+            return None
+
     async def remove_item_from_inventory(
         self,
         character_id: str,
@@ -280,21 +430,24 @@ class CharacterRepository:
         user_id: str = None
     ) -> bool:
         """Remove um item do inventário"""
+        oid = to_object_id(character_id)
+        if oid is None:
+            return False
         try:
-            query = {"_id": ObjectId(character_id), "active": True}
+            query = {"_id": oid, "active": True}
             if user_id:
                 query["user_id"] = user_id
             
-            result = self.collection.update_one(
+            result = await self.collection.update_one(
                 query,
                 {
                     "$pull": {"inventory": {"id": item_id}},
-                    "$set": {"updated_at": datetime.utcnow()}
+                    "$currentDate": _TOUCH_UPDATED_AT
                 }
             )
             
             return result.modified_count > 0
             
-        except Exception as e:
-            print(f"Erro ao remover item: {e}")
+        except Exception:
+            logger.exception("Erro ao remover item")
             return False
\ No newline at end of file
@@ -1,83 +1,106 @@
 import logging
-from datetime import datetime, timezone
 from typing import Any, Dict, Optional
-from bson import ObjectId
+from pymongo import IndexModel, ReturnDocument
 from pymongo.errors import DuplicateKeyError
-from app.core.database import get_database
-from app.core.security import get_password_hash
-from app.models.user import UserModel, UserResponse
+from app.core.database import get_async_database, utc_now
+from app.core.security import hash_password_async
+from app.models.object_id import to_object_id
+from app.models.user import UserResponse
 
 logger = logging.getLogger(__name__)
 
+_INDEXES = [IndexModel("email", unique=True)]
+_PUBLIC_PROJECTION = {"nome": 1, "email": 1, "created_at": 1, "ativo": 1}
+_AUTH_PROJECTION = {"email": 1, "ativo": 1}
+_TOUCH_UPDATED_AT = {"updated_at": True}
+
 class UserRepository:
+    _indexes_ensured = False
+
     def __init__(self):
-        self.db = get_database()
+        self.db = get_async_database()
         self.collection = self.db.users
-        self.collection.create_index("email", unique=True)
+
+    async def ensure_indexes(self):
+        """Cria o índice único de email (executado uma vez no startup)"""
+        if UserRepository._indexes_ensured:
+            return
+        await self.collection.create_indexes(_INDEXES)
+        UserRepository._indexes_ensured = True
 
     async def create_user(self, nome: str, email: str, senha: str) -> UserResponse:
-        """Cria um novo usuário"""
+        """Cria um novo usuário (o índice único de email levanta DuplicateKeyError)"""
         try:
-            if await self.get_user_by_email(email):
-                raise ValueError("Email já está em uso")
-            
-            senha_hash = get_password_hash(senha)
+            senha_hash = await hash_password_async(senha)
+            now = utc_now()
             user_data = {
                 "nome": nome,
                 "email": email,
                 "senha_hash": senha_hash,
-                "created_at": datetime.now(timezone.utc),
-                "updated_at": datetime.now(timezone.utc),
+                "created_at": now,
+                "updated_at": now,
                 "ativo": True,
             }
             
-            result = self.collection.insert_one(user_data)
-            user = self.collection.find_one({"_id": result.inserted_id})
-            return self._user_document_to_response(user)
+            result = await self.collection.insert_one(user_data)
+            user_data["_id"] = result.inserted_id
+            return self._user_document_to_response(user_data)
             
         except DuplicateKeyError:
-            raise ValueError("Email já está em uso")
+            raise
         except Exception as e:
             logger.error(f"Erro ao criar usuário: {e}")
             raise ValueError("Erro interno do servidor")
 
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
-        """Busca usuário por email"""
-        return self.collection.find_one({"email": email})
+        """Busca usuário por email (documento completo, inclui senha_hash para o login)"""
+        return await self.collection.find_one({"email": email})
+
+    async def get_public_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        """Busca usuário por email apenas com os campos públicos"""
+        return await self.collection.find_one({"email": email}, _PUBLIC_PROJECTION)
 
     async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
         """Busca usuário por ID"""
+        object_id = to_object_id(user_id)
+        if object_id is None:
+            return None
         try:
-            user = self.collection.find_one({"_id": ObjectId(user_id)})
+            user = await self.collection.find_one({"_id": object_id}, _PUBLIC_PROJECTION)
             if user:
                 return self._user_document_to_response(user)
             return None
         except Exception:
             return None
 
+    async def get_user_auth_fields(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Busca apenas _id, email e ativo do usuário (documento cru, sem validação Pydantic)"""
+        object_id = to_object_id(user_id)
+        if object_id is None:
+            return None
+        return await self.collection.find_one({"_id": object_id}, _AUTH_PROJECTION)
+
     async def update_user(self, user_id: str, update_fields: Dict[str, Any]) -> Optional[UserResponse]:
-        """Atualiza dados do usuário no banco de dados"""
+        """Atualiza o usuário ativo (updated_at via $currentDate) e retorna os dados públicos"""
+        object_id = to_object_id(user_id)
+        if object_id is None:
+            return None
         try:
-            object_id = ObjectId(user_id)
-            
-            result = self.collection.update_one(
+            updated_user_doc = await self.collection.find_one_and_update(
                 {"_id": object_id, "ativo": True},
-                {"$set": update_fields}
-            )
-            
-            if result.modified_count == 0:
-                logger.warning(f"Nenhum documento foi atualizado para user_id: {user_id}")
-                return None
-
-            updated_user_doc = self.collection.find_one(
-                {"_id": object_id, "ativo": True}
+                {"$set": update_fields, "$currentDate": _TOUCH_UPDATED_AT},
+                projection=_PUBLIC_PROJECTION,
+                return_document=ReturnDocument.AFTER
             )
             
             if updated_user_doc:
                 return self._user_document_to_response(updated_user_doc)
             
+            logger.warning(f"Nenhum documento foi atualizado para user_id: {user_id}")
             return None
             
+        except DuplicateKeyError:
+            raise
         except Exception as e:
             logger.error(f"Erro ao atualizar usuário {user_id}: {e}")
             return None
@@ -1,26 +1,14 @@
-from pydantic import BaseModel, EmailStr, validator, Field, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, StringConstraints
+from typing import Annotated, Optional
 from datetime import datetime
-import re
+
+Nome = Annotated[str, StringConstraints(strip_whitespace=True, min_length=2, max_length=100)]
+Senha = Annotated[str, StringConstraints(min_length=6)]
 
 class SignupRequest(BaseModel):
-    nome: str
+    nome: Nome
     email: EmailStr
-    senha: str
-    
-    @validator('nome')
-    def validate_nome(cls, v):
-        if len(v.strip()) < 2:
-            raise ValueError('Nome deve ter pelo menos 2 caracteres')
-        if len(v.strip()) > 100:
-            raise ValueError('Nome não pode ter mais de 100 caracteres')
-        return v.strip()
-    
-    @validator('senha')
-    def validate_senha(cls, v):
-        if len(v) < 6:
-            raise ValueError('Senha deve ter pelo menos 6 caracteres')
-        return v
+    senha: Senha
 
 class LoginRequest(BaseModel):
     email: EmailStr
@@ -42,23 +30,9 @@ class UserOut(BaseModel):
 
 class UpdateProfileRequest(BaseModel):
     """Schema para atualização de perfil do usuário"""
-    nome: str = Field(..., min_length=2, max_length=100, description="Nome completo do usuário")
+    nome: Nome = Field(..., description="Nome completo do usuário")
     email: EmailStr = Field(..., description="Email do usuário")
-    senha: Optional[str] = Field(None, min_length=6, max_length=100, description="Nova senha (opcional)")
-    
-    @validator('nome')
-    def validate_nome(cls, v):
-        if len(v.strip()) < 2:
-            raise ValueError('Nome deve ter pelo menos 2 caracteres')
-        if len(v.strip()) > 100:
-            raise ValueError('Nome não pode ter mais de 100 caracteres')
-        return v.strip()
-    
-    @validator('senha')
-    def validate_senha(cls, v):
-        if v is not None and len(v) < 6:
-            raise ValueError('Senha deve ter pelo menos 6 caracteres')
-        return v
+    senha: Optional[Senha] = Field(None, max_length=100, description="Nova senha (opcional)")
     
     model_config = ConfigDict(
         json_schema_extra={
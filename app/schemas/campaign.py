@@ -1,6 +1,6 @@
 from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_serializer
 
 class RewardSchema(BaseModel):
     type: str
@@ -39,12 +39,7 @@ class CampaignUpdate(BaseModel):
 
 class CampaignOut(BaseModel):
     """Schema de resposta de campanha"""
-    model_config = ConfigDict(
-        populate_by_name=True,
-        json_encoders={
-            datetime: lambda v: v.isoformat() if v else None
-        }
-    )
+    model_config = ConfigDict(populate_by_name=True)
     
     id: str
     campaign_id: str
@@ -69,6 +64,14 @@ class CampaignOut(BaseModel):
     completed_at: Optional[datetime] = None
     cancelled_at: Optional[datetime] = None
 
+    @field_serializer(
+        "created_at", "updated_at", "started_at", "last_played_at", "completed_at",
+        "cancelled_at", when_used="json-unless-none"
+    )
+    def serialize_datetime(self, value: datetime) -> str:
+        """Serializa datetime para ISO format"""
+        return value.isoformat()
+
 class StartCampaignRequest(BaseModel):
     """Schema para iniciar uma campanha"""
     character_id: str
@@ -1,6 +1,15 @@
-from typing import Optional, Dict, List
+from typing import Annotated, Optional, Dict, List
 from datetime import datetime
-from pydantic import BaseModel, Field, validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    StringConstraints,
+    field_serializer,
+    field_validator,
+)
+
+NonEmptyStr = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
 
 class Atributos(BaseModel):
     """Schema para os atributos do personagem"""
@@ -9,28 +18,17 @@ class Atributos(BaseModel):
     forca: int = Field(ge=8, le=20, default=10)
     inteligencia: int = Field(ge=8, le=20, default=10)
 
-    @validator('*')
-    def validate_attribute_range(cls, v):
-        if not 8 <= v <= 20:
-            raise ValueError('Atributo deve estar entre 8 e 20')
-        return v
-
 class CharacterCreate(BaseModel):
     """Schema para criar um personagem - corresponde ao frontend"""
-    name: str = Field(..., min_length=1, max_length=100)
-    raca: str = Field(..., min_length=1)
-    classe: str = Field(..., min_length=1)
+    name: NonEmptyStr = Field(..., max_length=100)
+    raca: NonEmptyStr
+    classe: NonEmptyStr
     descricao: Optional[str] = ""
     atributos: Atributos
     imageUrl: str = "assets/images/card-image1.jpg"
 
-    @validator('name', 'raca', 'classe')
-    def validate_not_empty(cls, v):
-        if not v or not v.strip():
-            raise ValueError('Campo não pode estar vazio')
-        return v.strip()
-
-    @validator('atributos')
+    @field_validator('atributos')
+    @classmethod
     def validate_total_points(cls, v):
         total = v.vida + v.energia + v.forca + v.inteligencia
         if total > 52:
@@ -74,11 +72,12 @@ class CharacterResponse(BaseModel):
     updated_at: Optional[datetime] = None
     active: bool = True
 
-    class Config:
-        populate_by_name = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    model_config = ConfigDict(populate_by_name=True)
+
+    @field_serializer("created_at", "updated_at", when_used="json-unless-none")
+    def serialize_datetime(self, value: datetime) -> str:
+        """Serializa datetime para ISO format"""
+        return value.isoformat()
 
 class CharacterListResponse(BaseModel):
     """Schema para listagem de personagens"""
@@ -1,18 +1,25 @@
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Dict, Any
+from pydantic import BaseModel, Field, TypeAdapter
+
+ActionPriority = Literal[1, 2, 3, 4, 5]
+ActionCategory = Literal[
+    "general", "extracted", "contextual", "smart_fallback", "basic_fallback", "progression"
+]
 
 class ChatMessage(BaseModel):
     """Mensagem de chat"""
     role: str = Field(..., description="Papel (user, assistant, system)")
     content: str = Field(..., description="Conteúdo da mensagem")
 
+CHAT_HISTORY_ADAPTER = TypeAdapter(List[ChatMessage])
+
 class ContextualAction(BaseModel):
     """Ação contextual sugerida pela LLM"""
     id: str = Field(..., description="ID único da ação")
     name: str = Field(..., description="Nome da ação")
     description: str = Field(..., description="Descrição da ação")
-    priority: int = Field(default=1, description="Prioridade (1-5)")
-    category: str = Field(default="general", description="Categoria da ação")
+    priority: ActionPriority = Field(default=1, description="Prioridade (1-5)")
+    category: ActionCategory = Field(default="general", description="Categoria da ação")
 
 class ProgressionInfo(BaseModel):
     """Informações sobre a progressão do capítulo"""
@@ -1,14 +1,18 @@
+import hashlib
 import logging
-from datetime import timedelta, datetime, timezone
-from typing import Optional
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 from fastapi import HTTPException, status
+from pymongo.errors import DuplicateKeyError
 from app.core.security import (
-    ACCESS_TOKEN_EXPIRE_MINUTES, 
     create_access_token, 
     create_refresh_token,
-    verify_password, 
+    verify_refresh_token,
+    verify_and_update_password_async, 
     SecurityService,
-    get_password_hash
+    hash_password_async,
+    pwd_context
 )
 from app.models.user import UserResponse
 from app.repositories.user_repo import UserRepository
@@ -16,41 +20,82 @@ from app.schemas.auth import LoginRequest, SignupRequest, TokenResponse, UpdateP
 
 logger = logging.getLogger(__name__)
 
+# hash fictício verificado quando o usuário não existe, igualando o custo das falhas de login
+_DUMMY_HASH = pwd_context.hash("not-a-real-password-timing-pad")
+_SECURITY = SecurityService()
+# access tokens recém-emitidos no refresh, reaproveitados por alguns segundos
+_TOKEN_CACHE: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+_TOKEN_CACHE_TTL = 5.0
+_TOKEN_CACHE_MAX = 10_000
+# refresh tokens já verificados (digest do token -> user_id), evitando decodificar o JWT em rajadas
+_REFRESH_CACHE: "dict[str, Tuple[str, float]]" = {}
+
+
+def _cached_access_token(user_id: str, email: str) -> str:
+    """Retorna o access token emitido há menos de _TOKEN_CACHE_TTL segundos ou emite um novo"""
+    key = (user_id, email)
+    now = time.monotonic()
+    cached = _TOKEN_CACHE.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+    
+    token = create_access_token(
+        data={"sub": user_id, "email": email}
+    )
+    _TOKEN_CACHE[key] = (token, now + _TOKEN_CACHE_TTL)
+    _TOKEN_CACHE.move_to_end(key)
+    if len(_TOKEN_CACHE) > _TOKEN_CACHE_MAX:
+        _TOKEN_CACHE.popitem(last=False)
+    return token
+
+
+def _verified_refresh_user(refresh_token: str) -> Optional[str]:
+    """Retorna o user_id do refresh token, reaproveitando verificações dos últimos _TOKEN_CACHE_TTL segundos"""
+    key = hashlib.blake2b(refresh_token.encode(), digest_size=16).hexdigest()
+    now = time.monotonic()
+    cached = _REFRESH_CACHE.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+    
+    user_id = verify_refresh_token(refresh_token)
+    if user_id:
+        if len(_REFRESH_CACHE) > _TOKEN_CACHE_MAX:
+            _REFRESH_CACHE.clear()
+        _REFRESH_CACHE[key] = (user_id, now + _TOKEN_CACHE_TTL)
+    return user_id
+
+
 class AuthService:
-    def __init__(self):
-        self.user_repo = UserRepository()
-        self.security = SecurityService()
+    def __init__(self, user_repo: UserRepository):
+        self.user_repo = user_repo
 
     async def signup(self, signup_data: SignupRequest) -> TokenResponse:
         """Registra um novo usuário com validações de segurança"""
         try:
-            validated_email = self.security.validate_email_format(signup_data.email)
-            validated_nome = self.security.validate_name(signup_data.nome)
+            validated_email = _SECURITY.validate_email_format(signup_data.email)
+            validated_nome = _SECURITY.validate_name(signup_data.nome)
             
-            existing_user = await self.user_repo.get_user_by_email(validated_email)
-            if existing_user:
+            try:
+                user = await self.user_repo.create_user(
+                    nome=validated_nome, 
+                    email=validated_email, 
+                    senha=signup_data.senha
+                )
+            except DuplicateKeyError:
                 logger.warning(f"Tentativa de registro com email já existente: {validated_email}")
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Email já está em uso"
                 )
             
-            user = await self.user_repo.create_user(
-                nome=validated_nome, 
-                email=validated_email, 
-                senha=signup_data.senha
-            )
-            
-            access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
             access_token = create_access_token(
-                data={"sub": user.id, "email": user.email}, 
-                expires_delta=access_token_expires
+                data={"sub": user.id, "email": user.email}
             )
             refresh_token = create_refresh_token(user.id)
             
-            logger.info(f"Usuário criado com sucesso: {user.email}")
+            logger.info("Usuário criado com sucesso: %s", user.email)
             
-            return TokenResponse(
+            return TokenResponse.model_construct(
                 access_token=access_token, 
                 refresh_token=refresh_token,
                 token_type="bearer"
@@ -74,38 +119,34 @@ class AuthService:
     async def login(self, login_data: LoginRequest) -> TokenResponse:
         """Autentica um usuário com medidas de segurança"""
         try:
-            validated_email = self.security.validate_email_format(login_data.email)
+            validated_email = _SECURITY.validate_email_format(login_data.email)
             
             user_doc = await self.user_repo.get_user_by_email(validated_email)
+            active_user = user_doc if user_doc and user_doc.get("ativo", True) else None
+            stored_hash = active_user["senha_hash"] if active_user else _DUMMY_HASH
             
-            if not user_doc or not user_doc.get("ativo", True):
-                logger.warning(f"Tentativa de login com usuário inexistente/inativo: {validated_email}")
-                import asyncio
-                await asyncio.sleep(0.1)
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Email ou senha incorretos"
-                )
-            
-            if not verify_password(login_data.senha, user_doc["senha_hash"]):
-                logger.warning(f"Tentativa de login com senha incorreta: {validated_email}")
-                import asyncio
-                await asyncio.sleep(0.1)
+            valid, new_hash = await verify_and_update_password_async(login_data.senha, stored_hash)
+            if not active_user or not valid:
+                if not active_user:
+                    logger.warning(f"Tentativa de login com usuário inexistente/inativo: {validated_email}")
+                else:
+                    logger.warning(f"Tentativa de login com senha incorreta: {validated_email}")
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Email ou senha incorretos"
                 )
 
-            access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+            if new_hash:
+                await self.user_repo.update_user(str(active_user["_id"]), {"senha_hash": new_hash})
+
             access_token = create_access_token(
-                data={"sub": str(user_doc["_id"]), "email": user_doc["email"]}, 
-                expires_delta=access_token_expires
+                data={"sub": str(active_user["_id"]), "email": active_user["email"]}
             )
-            refresh_token = create_refresh_token(str(user_doc["_id"]))
+            refresh_token = create_refresh_token(str(active_user["_id"]))
             
-            logger.info(f"Login bem-sucedido: {validated_email}")
+            logger.info("Login bem-sucedido: %s", validated_email)
             
-            return TokenResponse(
+            return TokenResponse.model_construct(
                 access_token=access_token,
                 refresh_token=refresh_token, 
                 token_type="bearer"
@@ -138,41 +179,31 @@ class AuthService:
     async def update_user_profile(self, user_id: str, update_data: UpdateProfileRequest) -> Optional[UserResponse]:
         """Atualiza dados do perfil do usuário com validações de segurança"""
         try:
-            validated_email = self.security.validate_email_format(update_data.email)
-            validated_nome = self.security.validate_name(update_data.nome)
+            validated_email = _SECURITY.validate_email_format(update_data.email)
+            validated_nome = _SECURITY.validate_name(update_data.nome)
             
-            current_user = await self.user_repo.get_user_by_id(user_id)
-            if not current_user or not current_user.ativo:
-                logger.warning(f"Tentativa de atualização de usuário inexistente/inativo: {user_id}")
-                return None
-            
-            if validated_email != current_user.email:
-                existing_user = await self.user_repo.get_user_by_email(validated_email)
-                if existing_user and str(existing_user.get("_id")) != user_id:
-                    logger.warning(f"Tentativa de atualização com email já em uso: {validated_email}")
-                    raise HTTPException(
-                        status_code=status.HTTP_409_CONFLICT,
-                        detail="Este email já está sendo usado por outro usuário"
-                    )
-
             update_fields = {
                 "nome": validated_nome,
-                "email": validated_email,
-                "updated_at": datetime.now(timezone.utc)
+                "email": validated_email
             }
             
             if update_data.senha:
-                if len(update_data.senha) < 6:
-                    raise ValueError("Senha deve ter pelo menos 6 caracteres")
-                update_fields["senha_hash"] = get_password_hash(update_data.senha)
+                update_fields["senha_hash"] = await hash_password_async(update_data.senha)
             
-            updated_user = await self.user_repo.update_user(user_id, update_fields)
+            try:
+                updated_user = await self.user_repo.update_user(user_id, update_fields)
+            except DuplicateKeyError:
+                logger.warning(f"Tentativa de atualização com email já em uso: {validated_email}")
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Este email já está sendo usado por outro usuário"
+                )
             
             if updated_user:
-                logger.info(f"Perfil atualizado com sucesso: {validated_email}")
+                logger.info("Perfil atualizado com sucesso: %s", validated_email)
                 return updated_user
             else:
-                logger.error(f"Falha ao atualizar usuário no banco: {user_id}")
+                logger.warning(f"Tentativa de atualização de usuário inexistente/inativo: {user_id}")
                 return None
                 
         except HTTPException:
@@ -192,32 +223,26 @@ class AuthService:
 
     async def refresh_access_token(self, refresh_token: str) -> TokenResponse:
         """Renova token de acesso usando refresh token"""
-        from app.core.security import verify_refresh_token
-        
         try:
-            user_id = verify_refresh_token(refresh_token)
+            user_id = _verified_refresh_user(refresh_token)
             if not user_id:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Refresh token inválido"
                 )
             
-            user = await self.get_current_user(user_id)
-            if not user:
+            user_doc = await self.user_repo.get_user_auth_fields(user_id)
+            if not user_doc or not user_doc.get("ativo", True):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Usuário não encontrado ou inativo"
                 )
             
-            access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-            access_token = create_access_token(
-                data={"sub": user.id, "email": user.email}, 
-                expires_delta=access_token_expires
-            )
+            access_token = _cached_access_token(str(user_doc["_id"]), user_doc["email"])
             
-            logger.info(f"Token renovado para usuário: {user.email}")
+            logger.info("Token renovado para usuário: %s", user_doc["email"])
             
-            return TokenResponse(
+            return TokenResponse.model_construct(
                 access_token=access_token,
                 refresh_token=refresh_token, 
                 token_type="bearer"
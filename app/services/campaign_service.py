@@ -1,54 +1,207 @@
-from typing import List, Optional, Dict
-from datetime import datetime
+from typing import Any, List, Optional, Dict, Tuple
+import time
+from collections import OrderedDict
 from bson import ObjectId
-from pymongo.database import Database
-from app.models.campaign import Campaign
+from pymongo import DeleteMany, IndexModel, ReturnDocument, UpdateMany, UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.database import utc_now
 from app.schemas.campaign import CampaignCreate, CampaignOut, CampaignUpdate
 import logging
 
 logger = logging.getLogger(__name__)
 
+_CTX_TTL = 300.0
+_CTX_CACHE_MAX = 10_000
+# cache por processo, uma entrada por usuário (só há uma campanha ativa): campanha, contexto, versão
+# (last_played_at do progresso, conferida a cada leitura para valer entre workers) e instante de expiração
+_CTX_CACHE: "OrderedDict[str, Tuple[str, Dict[str, Any], Any, float]]" = OrderedDict()
+# (user_id, campaign_id) identifica o progresso; (user_id, status) atende a busca da campanha ativa
+_PROGRESS_INDEXES = [
+    IndexModel([("user_id", 1), ("campaign_id", 1)], unique=True),
+    IndexModel([("user_id", 1), ("status", 1)]),
+]
+_CAMPAIGN_INDEXES = [
+    IndexModel([("user_id", 1), ("campaign_id", 1)]),
+    IndexModel([("user_id", 1), ("chapter", 1)]),
+]
+_BASE_TTL = 300.0
+# campanhas base (globais) por campaign_id, em ordem de capítulo, e o instante da carga
+_BASE_CACHE: Optional[Tuple[Dict[str, Dict[str, Any]], float]] = None
+_BASE_CAMPAIGNS = [
+    {
+        "campaign_id": "arena-sombras",
+        "title": "Capítulo 1 : O Cubo das Sombras",
+        "chapter": 1,
+        "description": "Nas profundezas de uma catedral em ruínas, o guerreiro sombrio encontra a Relíquia Perdida — um cubo pulsante de energia ancestral.",
+        "full_description": "Nas profundezas de uma catedral em ruínas, o guerreiro sombrio encontra a Relíquia Perdida — um cubo pulsante de energia ancestral. Para conquistá-lo, deve enfrentar as armadilhas ocultas que protegem seu poder e resistir à corrupção que emana da própria relíquia.",
+        "image": "./assets/images/campaign-thumb1.jpg",
+        "thumbnail": "./assets/images/campaign-thumb1.jpg",
+        "rewards": [
+            {"type": "artifact", "name": "Cubo das Sombras", "icon": "cubo_sombras"}
+        ],
+        "is_locked": False,
+        "user_id": None, 
+        "chapters_completed": []
+    },
+    {
+        "campaign_id": "laboratorio-cristais",
+        "title": "Capítulo 2 : Laboratório de Cristais Arcanos",
+        "chapter": 2,
+        "description": "Em um laboratório oculto nas profundezas da fortaleza inimiga, um cientista obcecado conduz experiências proibidas.",
+        "full_description": "Em um laboratório oculto nas profundezas da fortaleza inimiga, um cientista obcecado conduz experiências proibidas com fragmentos de energia arcana.",
+        "image": "./assets/images/campaign-thumb2.jpg",
+        "thumbnail": "./assets/images/campaign-thumb2.jpg",
+        "rewards": [
+            {"type": "crystal", "name": "Cristal Arcano Puro", "icon": "cristal_arcano"}
+        ],
+        "is_locked": False,
+        "user_id": None,
+        "chapters_completed": []
+    },
+    {
+        "campaign_id": "coliseu-de-neon",
+        "title": "Capítulo 3 : Coliseu de Neon",
+        "chapter": 3,
+        "description": "No coração da cidade subterrânea, em um beco cercado por prédios decadentes.",
+        "full_description": "No coração da cidade subterrânea, em um beco cercado por prédios decadentes e iluminado apenas por letreiros de neon.",
+        "image": "./assets/images/campaign-image3.jpg",
+        "thumbnail": "./assets/images/campaign-image3.jpg",
+        "rewards": [
+            {"type": "belt", "name": "Cinturão do Campeão", "icon": "cinturao_campeao"}
+        ],
+        "is_locked": False,
+        "user_id": None,
+        "chapters_completed": []
+    }
+]
+
+# campos de progresso mesclados na campanha e seus valores quando o usuário não tem progresso
+_PROGRESS_DEFAULTS = {
+    "status": None,
+    "active_character_id": None,
+    "active_character_name": None,
+    "current_chapter": 1,
+    "chapters_completed": None,  # lista nova por documento em _merge_progress
+    "started_at": None,
+    "last_played_at": None,
+}
+_PROGRESS_PROJECTION = {
+    "_id": 0,
+    "campaign_id": 1,
+    "status": 1,
+    "active_character_id": 1,
+    "active_character_name": 1,
+    "current_chapter": 1,
+    "chapters_completed": 1,
+    "started_at": 1,
+    "last_played_at": 1,
+}
+
+
+def get_campaign_ctx(campaign_id: str, user_id: str, version: Any) -> Optional[Dict[str, Any]]:
+    """Retorna o contexto de LLM da campanha em cache, se ainda válido e da mesma versão do progresso"""
+    entry = _CTX_CACHE.get(user_id)
+    if entry is None:
+        return None
+    if time.monotonic() >= entry[3]:
+        _CTX_CACHE.pop(user_id, None)
+        return None
+    if entry[0] == campaign_id and entry[2] == version:
+        return entry[1]
+    return None
+
+
+def set_campaign_ctx(campaign_id: str, user_id: str, ctx: Dict[str, Any], version: Any) -> None:
+    """Armazena o contexto de LLM da campanha para reuso entre interações"""
+    _CTX_CACHE[user_id] = (campaign_id, ctx, version, time.monotonic() + _CTX_TTL)
+    _CTX_CACHE.move_to_end(user_id)
+    if len(_CTX_CACHE) > _CTX_CACHE_MAX:
+        _CTX_CACHE.popitem(last=False)
+
+
+def invalidate_campaign_ctx(user_id: str) -> None:
+    """Descarta o contexto em cache do usuário (progresso da campanha mudou)"""
+    _CTX_CACHE.pop(user_id, None)
+
+
+def invalidate_base_campaigns() -> None:
+    """Descarta o cache das campanhas base (após um novo seed)"""
+    global _BASE_CACHE
+    _BASE_CACHE = None
+
 
 class CampaignService:
-    def __init__(self, db: Database, vector_store_service=None):
+    _indexes_ensured = False
+
+    def __init__(self, db: AsyncIOMotorDatabase, vector_store_service=None):
         self.db = db
         self.campaigns_collection = db["campaigns"]
         self.progress_collection = db["campaign_progress"]
         self.vector_store = vector_store_service
 
+    async def ensure_indexes(self):
+        """Cria os índices de campanhas e progresso (executado uma vez no startup)"""
+        if CampaignService._indexes_ensured:
+            return
+        try:
+            await self.progress_collection.create_indexes(_PROGRESS_INDEXES)
+            await self.campaigns_collection.create_indexes(_CAMPAIGN_INDEXES)
+            CampaignService._indexes_ensured = True
+        except Exception:
+            logger.exception("Erro ao criar índices de campanhas")
+
+    async def ensure_base_campaigns(self):
+        """Garante que as campanhas base existam sem sobrescrever as já criadas (executado no startup)"""
+        now = utc_now()
+        try:
+            await self.campaigns_collection.bulk_write([
+                UpdateOne(
+                    {"campaign_id": campaign["campaign_id"], "user_id": None},
+                    {"$setOnInsert": {**campaign, "created_at": now, "updated_at": now}},
+                    upsert=True,
+                )
+                for campaign in _BASE_CAMPAIGNS
+            ], ordered=False)
+            invalidate_base_campaigns()
+        except Exception:
+            logger.exception("Erro ao garantir campanhas base")
+
+    async def _base_campaigns(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna as campanhas base (campos já validados) do cache em memória, recarregando após _BASE_TTL"""
+        global _BASE_CACHE
+        if _BASE_CACHE and time.monotonic() - _BASE_CACHE[1] < _BASE_TTL:
+            return _BASE_CACHE[0]
+        
+        base = {}
+        async for doc in self.campaigns_collection.find({"user_id": None}).sort("chapter", 1):
+            doc["id"] = str(doc.pop("_id"))
+            base[doc["campaign_id"]] = dict(CampaignOut.model_validate(doc))
+        
+        if base:
+            _BASE_CACHE = (base, time.monotonic())
+        return base
+
     async def get_campaigns_with_progress(self, user_id: str = None) -> List[Dict]:
-        """Retorna todas as campanhas base com o progresso do usuário mesclado"""
+        """Retorna todas as campanhas base (cache) com o progresso do usuário mesclado"""
         campaigns = []
+        base_campaigns = await self._base_campaigns()
         
-        cursor = self.campaigns_collection.find({"user_id": None}).sort("chapter", 1)
+        progress_by_campaign = {}
+        if user_id and base_campaigns:
+            progress_cursor = self.progress_collection.find(
+                {"user_id": user_id, "campaign_id": {"$in": list(base_campaigns)}},
+                _PROGRESS_PROJECTION
+            )
+            async for progress in progress_cursor:
+                progress_by_campaign[progress["campaign_id"]] = progress
         
-        for doc in cursor:
-            doc["_id"] = str(doc["_id"])
-            doc["id"] = doc["_id"]
+        for campaign_id, base_doc in base_campaigns.items():
+            doc = dict(base_doc)
             
             if user_id:
-                progress = self.progress_collection.find_one({
-                    "user_id": user_id,
-                    "campaign_id": doc["campaign_id"]
-                })
-                
-                if progress:
-                    doc["status"] = progress.get("status", None)
-                    doc["active_character_id"] = progress.get("active_character_id", None)
-                    doc["active_character_name"] = progress.get("active_character_name", None)
-                    doc["current_chapter"] = progress.get("current_chapter", 1)
-                    doc["chapters_completed"] = progress.get("chapters_completed", [])
-                    doc["started_at"] = progress.get("started_at", None)
-                    doc["last_played_at"] = progress.get("last_played_at", None)
-                else:
-                    doc["status"] = None
-                    doc["active_character_id"] = None
-                    doc["active_character_name"] = None
-                    doc["current_chapter"] = 1
-                    doc["chapters_completed"] = []
-                    doc["started_at"] = None
+                self._merge_progress(doc, progress_by_campaign.get(campaign_id))
             
-            campaigns.append(CampaignOut(**doc))
+            campaigns.append(CampaignOut.model_construct(**doc))
         
         return campaigns
 
@@ -58,56 +211,54 @@ class CampaignService:
 
     async def get_campaign_by_id(self, campaign_id: str, user_id: str = None) -> Optional[CampaignOut]:
         """Busca uma campanha específica com progresso do usuário"""
-        doc = self.campaigns_collection.find_one({
-            "campaign_id": campaign_id,
-            "user_id": None 
-        })
+        base_campaigns = await self._base_campaigns()
+        base_doc = base_campaigns.get(campaign_id)
         
-        if not doc:
+        if not base_doc:
             return None
         
-        doc["_id"] = str(doc["_id"])
-        doc["id"] = doc["_id"]
+        doc = dict(base_doc)
         
         if user_id:
-            progress = self.progress_collection.find_one({
+            progress = await self.progress_collection.find_one({
                 "user_id": user_id,
                 "campaign_id": campaign_id
             })
             
             if progress:
-                doc["status"] = progress.get("status", None)
-                doc["active_character_id"] = progress.get("active_character_id", None)
-                doc["active_character_name"] = progress.get("active_character_name", None)
-                doc["current_chapter"] = progress.get("current_chapter", 1)
-                doc["chapters_completed"] = progress.get("chapters_completed", [])
-                doc["started_at"] = progress.get("started_at", None)
+                self._merge_progress(doc, progress)
         
-        return CampaignOut(**doc)
+        return CampaignOut.model_construct(**doc)
+
+    async def _with_progress(self, campaign_id: str, progress: Optional[Dict[str, Any]]) -> Optional[CampaignOut]:
+        """Monta a campanha a partir da base em cache e de um progresso já lido"""
+        if not progress:
+            return None
+        base_doc = (await self._base_campaigns()).get(campaign_id)
+        if not base_doc:
+            return None
+        doc = dict(base_doc)
+        self._merge_progress(doc, progress)
+        return CampaignOut.model_construct(**doc)
+
+    @staticmethod
+    def _merge_progress(doc: Dict[str, Any], progress: Optional[Dict[str, Any]]) -> None:
+        """Copia os campos de progresso do usuário (ou os padrões) para o documento da campanha"""
+        doc.update(_PROGRESS_DEFAULTS)
+        doc["chapters_completed"] = []
+        if progress:
+            doc.update({field: progress[field] for field in _PROGRESS_DEFAULTS.keys() & progress.keys()})
 
     async def start_campaign(self, campaign_id: str, character_id: str, character_name: str, user_id: str) -> CampaignOut:
         """Inicia uma campanha criando/atualizando o progresso do usuário"""
         
-        campaign = self.campaigns_collection.find_one({
-            "campaign_id": campaign_id,
-            "user_id": None
-        })
-        
-        if not campaign:
-            await self.seed_campaigns()
-            campaign = self.campaigns_collection.find_one({
-                "campaign_id": campaign_id,
-                "user_id": None
-            })
+        base_campaigns = await self._base_campaigns()
+        base_doc = base_campaigns.get(campaign_id)
         
-        if not campaign:
+        if not base_doc:
             raise ValueError(f"Campanha {campaign_id} não encontrada")
         
-        self.progress_collection.update_many(
-            {"user_id": user_id, "status": "in_progress"},
-            {"$set": {"status": "cancelled"}}
-        )
-        
+        now = utc_now()
         progress_data = {
             "user_id": user_id,
             "campaign_id": campaign_id,
@@ -117,29 +268,38 @@ class CampaignService:
             "current_chapter": 1,
             "chapters_completed": [],
             "items_collected": [],
-            "started_at": datetime.now(),
-            "last_played_at": datetime.now()
+            "started_at": now,
+            "last_played_at": now
         }
         
-        self.progress_collection.update_one(
-            {"user_id": user_id, "campaign_id": campaign_id},
-            {"$set": progress_data},
-            upsert=True
-        )
+        await self.progress_collection.bulk_write([
+            UpdateMany(
+                {"user_id": user_id, "status": "in_progress", "campaign_id": {"$ne": campaign_id}},
+                {"$set": {"status": "cancelled"}}
+            ),
+            UpdateOne(
+                {"user_id": user_id, "campaign_id": campaign_id},
+                {"$set": progress_data},
+                upsert=True
+            )
+        ], ordered=True)
+        invalidate_campaign_ctx(user_id)
         
-        return await self.get_campaign_by_id(campaign_id, user_id)
+        doc = dict(base_doc)
+        self._merge_progress(doc, progress_data)
+        return CampaignOut.model_construct(**doc)
 
     async def get_active_campaign(self, user_id: str) -> Optional[CampaignOut]:
-        """Retorna a campanha ativa do usuário (apenas in_progress)"""
-        progress = self.progress_collection.find_one({
-            "user_id": user_id,
-            "status": "in_progress" 
-        })
+        """Retorna a campanha ativa do usuário (apenas in_progress), mesclada à campanha base em cache"""
+        progress = await self.progress_collection.find_one(
+            {"user_id": user_id, "status": "in_progress"},
+            _PROGRESS_PROJECTION
+        )
         
         if not progress:
             return None
         
-        return await self.get_campaign_by_id(progress["campaign_id"], user_id)
+        return await self._with_progress(progress["campaign_id"], progress)
 
     async def complete_chapter(self, campaign_id: str, chapter: int, user_id: str) -> Optional[CampaignOut]:
         """
@@ -179,29 +339,32 @@ class CampaignService:
             except Exception as e:
                 logger.error(f"Erro ao limpar narrativas: {e}")
 
-        result = self.progress_collection.update_one(
+        now = utc_now()
+        progress = await self.progress_collection.find_one_and_update(
             {"user_id": user_id, "campaign_id": campaign_id},
             {
                 "$addToSet": {"chapters_completed": chapter},
                 "$set": {
                     "status": "completed", 
-                    "completed_at": datetime.now(),
+                    "completed_at": now,
                     "active_character_id": None, 
                     "active_character_name": None,
-                    "last_played_at": datetime.now()
+                    "last_played_at": now
                 }
-            }
+            },
+            projection=_PROGRESS_PROJECTION,
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.modified_count:
+        invalidate_campaign_ctx(user_id)
+
+        if progress:
             logger.info(f"✓ Capítulo {chapter} marcado como completo")
-            return await self.get_campaign_by_id(campaign_id, user_id)
-        
-        return None
+        return await self._with_progress(campaign_id, progress)
 
     async def cancel_campaign(self, campaign_id: str, user_id: str) -> bool:
         """Cancela uma campanha ativa do usuário"""
-        result = self.progress_collection.update_one(
+        result = await self.progress_collection.update_one(
             {
                 "user_id": user_id,
                 "campaign_id": campaign_id,
@@ -212,18 +375,20 @@ class CampaignService:
                     "status": "cancelled",
                     "active_character_id": None,
                     "active_character_name": None,
-                    "cancelled_at": datetime.now()
+                    "cancelled_at": utc_now()
                 }
             }
         )
+        invalidate_campaign_ctx(user_id)
         return result.modified_count > 0
 
     async def update_campaign_progress(self, user_id: str, campaign_id: str, update_data: dict) -> bool:
         """Atualiza progresso da campanha do usuário"""
-        result = self.progress_collection.update_one(
+        result = await self.progress_collection.update_one(
             {"user_id": user_id, "campaign_id": campaign_id},
             {"$set": update_data}
         )
+        invalidate_campaign_ctx(user_id)
         return result.modified_count > 0
 
     async def update_campaign(self, campaign_id: str, update_data: any, user_id: str = None) -> Optional[CampaignOut]:
@@ -238,77 +403,38 @@ class CampaignService:
             update_dict['cancelled_at'] = update_data.cancelled_at
             
         if update_dict:
-            result = self.progress_collection.update_one(
+            progress = await self.progress_collection.find_one_and_update(
                 {"user_id": user_id, "campaign_id": campaign_id},
                 {"$set": update_dict},
-                upsert=True
+                projection=_PROGRESS_PROJECTION,
+                upsert=True,
+                return_document=ReturnDocument.AFTER
             )
-            
-            if result.modified_count or result.upserted_id:
-                return await self.get_campaign_by_id(campaign_id, user_id)
+            invalidate_campaign_ctx(user_id)
+            return await self._with_progress(campaign_id, progress)
         
         return None
 
     async def seed_campaigns(self) -> List[CampaignOut]:
         """Cria as campanhas base (globais) no banco"""
         
-        self.campaigns_collection.delete_many({"user_id": None})
-        
-        campaigns_data = [
-            {
-                "campaign_id": "arena-sombras",
-                "title": "Capítulo 1 : O Cubo das Sombras",
-                "chapter": 1,
-                "description": "Nas profundezas de uma catedral em ruínas, o guerreiro sombrio encontra a Relíquia Perdida — um cubo pulsante de energia ancestral.",
-                "full_description": "Nas profundezas de uma catedral em ruínas, o guerreiro sombrio encontra a Relíquia Perdida — um cubo pulsante de energia ancestral. Para conquistá-lo, deve enfrentar as armadilhas ocultas que protegem seu poder e resistir à corrupção que emana da própria relíquia.",
-                "image": "./assets/images/campaign-thumb1.jpg",
-                "thumbnail": "./assets/images/campaign-thumb1.jpg",
-                "rewards": [
-                    {"type": "artifact", "name": "Cubo das Sombras", "icon": "cubo_sombras"}
-                ],
-                "is_locked": False,
-                "user_id": None, 
-                "chapters_completed": [],
-                "created_at": datetime.now(),
-                "updated_at": datetime.now()
-            },
-            {
-                "campaign_id": "laboratorio-cristais",
-                "title": "Capítulo 2 : Laboratório de Cristais Arcanos",
-                "chapter": 2,
-                "description": "Em um laboratório oculto nas profundezas da fortaleza inimiga, um cientista obcecado conduz experiências proibidas.",
-                "full_description": "Em um laboratório oculto nas profundezas da fortaleza inimiga, um cientista obcecado conduz experiências proibidas com fragmentos de energia arcana.",
-                "image": "./assets/images/campaign-thumb2.jpg",
-                "thumbnail": "./assets/images/campaign-thumb2.jpg",
-                "rewards": [
-                    {"type": "crystal", "name": "Cristal Arcano Puro", "icon": "cristal_arcano"}
-                ],
-                "is_locked": False,
-                "user_id": None,
-                "chapters_completed": [],
-                "created_at": datetime.now(),
-                "updated_at": datetime.now()
-            },
-            {
-                "campaign_id": "coliseu-de-neon",
-                "title": "Capítulo 3 : Coliseu de Neon",
-                "chapter": 3,
-                "description": "No coração da cidade subterrânea, em um beco cercado por prédios decadentes.",
-                "full_description": "No coração da cidade subterrânea, em um beco cercado por prédios decadentes e iluminado apenas por letreiros de neon.",
-                "image": "./assets/images/campaign-image3.jpg",
-                "thumbnail": "./assets/images/campaign-image3.jpg",
-                "rewards": [
-                    {"type": "belt", "name": "Cinturão do Campeão", "icon": "cinturao_campeao"}
-                ],
-                "is_locked": False,
-                "user_id": None,
-                "chapters_completed": [],
-                "created_at": datetime.now(),
-                "updated_at": datetime.now()
-            }
+        now = utc_now()
+        operations = [
+            UpdateOne(
+                {"campaign_id": campaign["campaign_id"], "user_id": None},
+                {"$set": {**campaign, "updated_at": now}, "$setOnInsert": {"created_at": now}},
+                upsert=True,
+            )
+            for campaign in _BASE_CAMPAIGNS
         ]
+        operations.append(DeleteMany({
+            "user_id": None,
+            "campaign_id": {"$nin": [campaign["campaign_id"] for campaign in _BASE_CAMPAIGNS]}
+        }))
         
-        result = self.campaigns_collection.insert_many(campaigns_data)
-        print(f"✓ {len(result.inserted_ids)} campanhas base criadas!")
+        await self.campaigns_collection.bulk_write(operations, ordered=False)
+        _CTX_CACHE.clear()
+        invalidate_base_campaigns()
+        logger.info("%d campanhas base criadas", len(_BASE_CAMPAIGNS))
         
         return await self.get_campaigns_with_progress(None)
\ No newline at end of file
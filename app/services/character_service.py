@@ -1,7 +1,37 @@
-from typing import List, Optional
+import re
+from datetime import datetime
+from typing import List, Optional, Tuple
+from bson import ObjectId
+
+from app.models.character import CHARACTER_LIST_ADAPTER
 from app.repositories.character_repo import CharacterRepository
 from app.schemas.character import CharacterCreate, CharacterUpdate, CharacterResponse
-from app.models.character import CharacterModel
+
+_ATTRIBUTE_BONUS_RE = re.compile(r'[+]?(\d+)\s*(?:de\s+)?(\w+)')
+_ATTRIBUTE_MAP = {
+    'vida': 'vida',
+    'energy': 'energia',
+    'energia': 'energia',
+    'força': 'forca',
+    'forca': 'forca',
+    'strength': 'forca',
+    'inteligência': 'inteligencia',
+    'inteligencia': 'inteligencia',
+    'intelligence': 'inteligencia'
+}
+
+
+def encode_page_cursor(character) -> str:
+    """Gera o cursor opaco (created_at + _id) do último item de uma página"""
+    return f"{character.created_at.isoformat()}_{character.id}"
+
+
+def decode_page_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Extrai created_at e _id de um cursor de paginação"""
+    created_at, _, character_id = cursor.rpartition("_")
+    if not ObjectId.is_valid(character_id):
+        raise ValueError("Cursor de paginação inválido")
+    return datetime.fromisoformat(created_at), character_id
 
 
 class CharacterService:
@@ -10,53 +40,48 @@ class CharacterService:
     def __init__(self, repository: CharacterRepository):
         self.repository = repository
     
+    @staticmethod
+    def _to_response(character) -> CharacterResponse:
+        """Converte o modelo do repositório na resposta da API (inventário nunca nulo)"""
+        char_dict = character.model_dump(by_alias=True)
+        if char_dict.get('inventory') is None:
+            char_dict['inventory'] = []
+        return CharacterResponse(**char_dict)
+    
     async def create_character(self, character_data: CharacterCreate, user_id: str = None) -> CharacterResponse:
         """Cria um novo personagem"""
-        character_dict = character_data.dict()
-        character = await self.repository.create(character_dict, user_id)
-        return CharacterResponse(**character.dict(by_alias=True))
+        character = await self.repository.create(character_data.model_dump(exclude_none=True), user_id)
+        return self._to_response(character)
     
-    async def list_characters(self, user_id: str = None, page: int = 1, limit: int = 10) -> dict:
-        """Lista personagens com paginação"""
+    async def list_characters(
+        self,
+        user_id: str = None,
+        page: int = 1,
+        limit: int = 10,
+        cursor: Optional[str] = None
+    ) -> dict:
+        """Lista personagens com paginação (por página ou pelo cursor da página anterior)"""
         skip = (page - 1) * limit
+        after, after_id = decode_page_cursor(cursor) if cursor else (None, None)
         
-        characters = await self.repository.get_all(user_id, skip, limit)
-        total = await self.repository.count(user_id)
+        characters, total = await self.repository.list_paginated(user_id, skip, limit, after, after_id)
+        characters_dict = CHARACTER_LIST_ADAPTER.dump_python(characters, by_alias=True)
         pages = (total + limit - 1) // limit
         
-        characters_dict = []
-        for char in characters:
-            char_dict = char.dict(by_alias=True)
-            
-            if 'inventory' not in char_dict or char_dict['inventory'] is None:
-                char_dict['inventory'] = []
-            
-            if char_dict['inventory']:
-                char_dict['inventory'] = [
-                    item.dict() if hasattr(item, 'dict') else item 
-                    for item in char_dict['inventory']
-                ]
-            
-            characters_dict.append(char_dict)
-        
         return {
             "characters": characters_dict,
             "total": total,
             "page": page,
             "limit": limit,
-            "pages": pages
+            "pages": pages,
+            "next_cursor": encode_page_cursor(characters[-1]) if len(characters) == limit else None
         }
     
     async def get_character(self, character_id: str, user_id: str = None) -> Optional[CharacterResponse]:
         """Busca um personagem por ID"""
         character = await self.repository.get_by_id(character_id, user_id)
         if character:
-            char_dict = character.dict(by_alias=True)
-            
-            if 'inventory' not in char_dict or char_dict['inventory'] is None:
-                char_dict['inventory'] = []
-            
-            return CharacterResponse(**char_dict)
+            return self._to_response(character)
         return None
     
     async def update_character(
@@ -66,15 +91,10 @@ class CharacterService:
         user_id: str = None
     ) -> Optional[CharacterResponse]:
         """Atualiza um personagem"""
-        update_dict = update_data.dict(exclude_unset=True)
+        update_dict = update_data.model_dump(exclude_unset=True, exclude_none=True)
         character = await self.repository.update(character_id, update_dict, user_id)
         if character:
-            char_dict = character.dict(by_alias=True)
-            
-            if 'inventory' not in char_dict or char_dict['inventory'] is None:
-                char_dict['inventory'] = []
-                
-            return CharacterResponse(**char_dict)
+            return self._to_response(character)
         return None
     
     async def delete_character(self, character_id: str, user_id: str = None) -> bool:
@@ -83,28 +103,16 @@ class CharacterService:
     
     async def select_character(self, character_id: str, user_id: str = None) -> Optional[CharacterResponse]:
         """Seleciona um personagem"""
-        await self.repository.unselect_all_characters(user_id)
-        
         character = await self.repository.select_character_by_id(character_id, user_id)
         if character:
-            char_dict = character.dict(by_alias=True)
-            
-            if 'inventory' not in char_dict or char_dict['inventory'] is None:
-                char_dict['inventory'] = []
-                
-            return CharacterResponse(**char_dict)
+            return self._to_response(character)
         return None
     
     async def get_selected_character(self, user_id: str = None) -> Optional[CharacterResponse]:
         """Busca o personagem selecionado"""
         character = await self.repository.get_selected_character(user_id)
         if character:
-            char_dict = character.dict(by_alias=True)
-            
-            if 'inventory' not in char_dict or char_dict['inventory'] is None:
-                char_dict['inventory'] = []
-                
-            return CharacterResponse(**char_dict)
+            return self._to_response(character)
         return None
     
     async def use_item(
@@ -118,14 +126,7 @@ class CharacterService:
         if not character:
             return None
         
-        item = None
-        item_index = None
-        for idx, inv_item in enumerate(character.inventory):
-            if inv_item.id == item_id:
-                item = inv_item
-                item_index = idx
-                break
-        
+        item = next((inv_item for inv_item in character.inventory if inv_item.id == item_id), None)
         if not item:
             raise ValueError("Item não encontrado no inventário")
         
@@ -136,19 +137,9 @@ class CharacterService:
             if attr in new_attributes:
                 new_attributes[attr] = min(20, new_attributes[attr] + value)
         
-        new_inventory = [inv_item for idx, inv_item in enumerate(character.inventory) if idx != item_index]
-        
-        update_dict = {
-            "atributos": new_attributes,
-            "inventory": [item.dict() if hasattr(item, 'dict') else item for item in new_inventory]
-        }
-        
-        character = await self.repository.update(character_id, update_dict, user_id)
+        character = await self.repository.consume_item(character_id, item_id, new_attributes, user_id)
         if character:
-            char_dict = character.dict(by_alias=True)
-            if 'inventory' not in char_dict or char_dict['inventory'] is None:
-                char_dict['inventory'] = []
-            return CharacterResponse(**char_dict)
+            return self._to_response(character)
         return None
 
     def _extract_item_bonus(self, item) -> dict:
@@ -173,26 +164,8 @@ class CharacterService:
     def _parse_attribute_string(self, text: str) -> dict:
         """Parseia strings como '+3 Força' para extrair bônus"""
         bonus = {}
-        text = text.lower()
-        
-        attr_map = {
-            'vida': 'vida',
-            'energy': 'energia',
-            'energia': 'energia',
-            'força': 'forca',
-            'forca': 'forca',
-            'strength': 'forca',
-            'inteligência': 'inteligencia',
-            'inteligencia': 'inteligencia',
-            'intelligence': 'inteligencia'
-        }
-        
-        import re
-        pattern = r'[+]?(\d+)\s*(?:de\s+)?(\w+)'
-        matches = re.findall(pattern, text)
-        
-        for value, attr_name in matches:
-            attr_key = attr_map.get(attr_name.lower())
+        for value, attr_name in _ATTRIBUTE_BONUS_RE.findall(text.lower()):
+            attr_key = _ATTRIBUTE_MAP.get(attr_name)
             if attr_key:
                 bonus[attr_key] = int(value)
         
@@ -1,10 +1,42 @@
 import logging
-from typing import Dict, Any, Optional
-from datetime import datetime
+import re
+from typing import Dict, Any, Optional, Pattern
 import uuid
 
+from app.core.database import utc_now
+
 logger = logging.getLogger(__name__)
 
+
+def _compile_any(phrases) -> Pattern:
+    """Compila uma alternância literal que encontra qualquer uma das frases em uma única varredura"""
+    return re.compile("|".join(re.escape(p) for p in sorted(set(phrases), key=len, reverse=True)))
+
+
+_ACTION_WORDS = (
+    "obtém", "obteve", "recebe", "recebeu", "conquista", "conquistou",
+    "adquire", "adquiriu", "pega", "pegou", "encontra", "encontrou",
+    "consegue", "conseguiu", "alcança", "alcançou", "segura", "segurou",
+    "toma", "tomou", "coleta", "coletou", "apanha", "apanhou",
+    "captura", "capturou", "tem a", "tem o"
+)
+_ALTERNATIVE_NAMES = {
+    1: ("relíquia perdida", "relíquia", "cubo das sombras", "cubo", "objeto"),
+    2: ("cristal arcano", "cristal puro", "cristal", "fragmento arcano"),
+    3: ("cinturão do campeão", "cinturão", "troféu", "prêmio")
+}
+_COMPLETION_PHRASES = (
+    "fim do capítulo",
+    "capítulo concluído",
+    "missão cumprida",
+    "objetivo alcançado",
+    "final do capítulo",
+    "recompensa final",
+    "vitória"
+)
+_ACTION_RE = _compile_any(_ACTION_WORDS)
+_COMPLETION_RE = _compile_any(_COMPLETION_PHRASES)
+
 class InventoryService:
     """Serviço para gerenciar inventário e recompensas de capítulos"""
     
@@ -44,6 +76,14 @@ class InventoryService:
         }
     }
     
+    # nome da recompensa (palavras com mais de 3 letras) e nomes alternativos, compilados por capítulo
+    _REWARD_PATTERNS: Dict[int, Pattern] = {
+        chapter: _compile_any(
+            [w.lower() for w in reward["name"].split() if len(w) > 3] + list(_ALTERNATIVE_NAMES.get(chapter, ()))
+        )
+        for chapter, reward in CHAPTER_REWARDS.items()
+    }
+    
     @classmethod
     def get_chapter_reward(cls, chapter: int) -> Optional[Dict[str, Any]]:
         """Retorna a recompensa definida para o capítulo"""
@@ -67,7 +107,7 @@ class InventoryService:
         reward_item["id"] = f"{reward_item['id']}_{uuid.uuid4().hex[:8]}"
         reward_item["chapter"] = chapter
         reward_item["campaign_id"] = campaign_id
-        reward_item["obtained_at"] = datetime.utcnow()
+        reward_item["obtained_at"] = utc_now()
         
         return reward_item
     
@@ -77,56 +117,25 @@ class InventoryService:
         Detecta se a recompensa foi entregue na resposta da LLM
         Versão robusta com múltiplos padrões de detecção
         """
-        reward = cls.get_chapter_reward(chapter)
+        reward_pattern = cls._REWARD_PATTERNS.get(chapter)
         
-        if not reward:
+        if not reward_pattern:
             logger.warning(f"Nenhuma recompensa definida para o capítulo {chapter}")
             return False
         
         response_lower = llm_response.lower()
         
-        action_words = [
-            "obtém", "obteve", "recebe", "recebeu", "conquista", "conquistou",
-            "adquire", "adquiriu", "pega", "pegou", "encontra", "encontrou",
-            "consegue", "conseguiu", "alcança", "alcançou", "segura", "segurou",
-            "toma", "tomou", "coleta", "coletou", "apanha", "apanhou",
-            "captura", "capturou", "tem a", "tem o"
-        ]
-
-        reward_words = [w.lower() for w in reward["name"].split() if len(w) > 3]
-        
-        alternative_names = {
-            1: ["relíquia perdida", "relíquia", "cubo das sombras", "cubo", "objeto"],
-            2: ["cristal arcano", "cristal puro", "cristal", "fragmento arcano"],
-            3: ["cinturão do campeão", "cinturão", "troféu", "prêmio"]
-        }
-        
-        completion_phrases = [
-            "fim do capítulo",
-            "capítulo concluído",
-            "missão cumprida",
-            "objetivo alcançado",
-            "final do capítulo",
-            "recompensa final",
-            "vitória"
-        ]
+        has_reward = reward_pattern.search(response_lower) is not None
+        has_action = has_reward and _ACTION_RE.search(response_lower) is not None
+        is_completion = has_reward and not has_action and _COMPLETION_RE.search(response_lower) is not None
         
-        has_action = any(word in response_lower for word in action_words)
-        has_reward_name = any(word in response_lower for word in reward_words)
-        has_alternative = any(alt in response_lower for alt in alternative_names.get(chapter, []))
-        is_completion = any(phrase in response_lower for phrase in completion_phrases)
-        
-        logger.debug(f"Detecção de recompensa Capítulo {chapter}:")
-        logger.debug(f"  - Has action: {has_action}")
-        logger.debug(f"  - Has reward name: {has_reward_name}")
-        logger.debug(f"  - Has alternative: {has_alternative}")
-        logger.debug(f"  - Is completion: {is_completion}")
-        
-        detected = (
-            (has_action and (has_reward_name or has_alternative)) or
-            (is_completion and (has_reward_name or has_alternative))
+        logger.debug(
+            f"Detecção de recompensa Capítulo {chapter}: reward={has_reward} "
+            f"action={has_action} completion={is_completion}"
         )
         
+        detected = has_reward and (has_action or is_completion)
+        
         if detected:
             logger.info(f"Recompensa do capítulo {chapter} detectada!")
         else:
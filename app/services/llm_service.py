@@ -1,15 +1,79 @@
 import logging
-import json
 import re
-from typing import Dict, Any, Optional, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from enum import Enum
 import httpx
 import asyncio
+import random
+import orjson
+from pydantic import TypeAdapter
 from app.config import GROQ_API_KEY, LLM_MODEL, LLM_MAX_TOKENS, LLM_TEMPERATURE
+from app.schemas.llm import ContextualAction
+from app.services.inventory_service import InventoryService
 from app.services.vector_store_service import VectorStoreService
 
 logger = logging.getLogger(__name__)
 
+_ACTIONS_ADAPTER = TypeAdapter(List[ContextualAction])
+_GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+_HTTP_TIMEOUT = 20.0
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+_http_client: Optional[httpx.AsyncClient] = None
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+_RETRY_BASE_DELAY = 0.5
+_RETRY_MAX_DELAY = 8.0
+_RETRY_HEADERS = ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+# formato do reset da Groq: "7.66s", "2m59.56s", "120ms"
+_RESET_DURATION_RE = re.compile(r"(?:(\d+)m(?!s))?(?:([\d.]+)(ms|s))?")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Cliente HTTP compartilhado com a Groq (keep-alive evita novo handshake TLS a cada chat)"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            base_url=_GROQ_BASE_URL,
+            headers={
+                "Authorization": f"Bearer {GROQ_API_KEY}",
+                "Content-Type": "application/json"
+            },
+            timeout=_HTTP_TIMEOUT,
+            limits=_HTTP_LIMITS
+        )
+    return _http_client
+
+
+def _header_seconds(value: str) -> Optional[float]:
+    """Converte Retry-After ("2") ou o reset da Groq ("2m59.56s", "120ms") em segundos"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    match = _RESET_DURATION_RE.fullmatch(value.strip())
+    if not value.strip() or not match:
+        return None
+    minutes, amount, unit = match.groups()
+    seconds = float(amount or 0) / (1000 if unit == "ms" else 1)
+    return int(minutes or 0) * 60 + seconds
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Espera antes da próxima tentativa: o prazo indicado pela Groq ou backoff exponencial com jitter"""
+    for header in _RETRY_HEADERS:
+        value = response.headers.get(header)
+        delay = _header_seconds(value) if value else None
+        if delay is not None:
+            return min(max(delay, 0.0), _RETRY_MAX_DELAY)
+    return min(_RETRY_BASE_DELAY * 2 ** attempt + random.random() * _RETRY_BASE_DELAY, _RETRY_MAX_DELAY)
+
+
+async def close_http_client() -> None:
+    """Fecha o cliente HTTP compartilhado (executado no shutdown)"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 class ProgressionPhase(Enum):
     INTRODUCTION = "introduction"
     DEVELOPMENT = "development"    
@@ -98,12 +162,11 @@ class ChapterProgressionManager:
 class LLMService:
     """Service para integração com LLM usando Groq com sistema de progressão e RAG"""
     
-    def __init__(self):
+    def __init__(self, vector_store: Optional[VectorStoreService] = None):
         self.api_key = GROQ_API_KEY
-        self.base_url = "https://api.groq.com/openai/v1" 
         self.model = LLM_MODEL
         self.progression_manager = ChapterProgressionManager()
-        self.vector_store = VectorStoreService()
+        self.vector_store = vector_store or VectorStoreService()
         
     async def chat_with_llm(
         self, 
@@ -128,84 +191,165 @@ class LLMService:
             result = await self._make_llm_request(
                 message, character_context, campaign_context, 
                 conversation_history, generate_actions, use_strict_format=False,
-                interaction_count=interaction_count
+                interaction_count=interaction_count,
+                max_retries=max_retries
             )
             
             if not result["success"]:
                 return result
-                
-            llm_response = result["raw_response"]
-            logger.info(f"Resposta completa da LLM (Interação {interaction_count}/10): {llm_response}")
-            
-            contextual_actions = []
-            if generate_actions:
-                contextual_actions = self._extract_actions_from_response(llm_response)
-
-                progression_actions = self._get_progression_actions(interaction_count, campaign_context)
-                if progression_actions:
-                    contextual_actions.extend(progression_actions)
-                
-                if not contextual_actions or self._is_fallback_actions(contextual_actions):
-                    logger.info("Primeira tentativa falhou, tentando formato rigoroso...")
-                    strict_result = await self._retry_with_strict_format(
-                        message, character_context, campaign_context, 
-                        conversation_history, interaction_count
-                    )
-                    
-                    if strict_result and strict_result.get("contextual_actions"):
-                        contextual_actions = strict_result["contextual_actions"]
-                        logger.info("Ações extraídas com sucesso no formato rigoroso")
-                
-                logger.info(f"Ações finais extraídas: {contextual_actions}")
             
-            clean_response = self._clean_response_text(llm_response)
-
-            if campaign_context and character_context:
-                try:
-                    chapter = campaign_context.get('current_chapter', 1) or 1
-                    phase = self.progression_manager.get_current_phase(interaction_count)
-                    
-                    doc_id = self.vector_store.store_narrative(
-                        narrative_text=clean_response,
-                        campaign_id=str(campaign_context.get('_id', 'unknown')),
-                        character_id=str(character_context.get('_id', 'unknown')),
-                        user_id=str(campaign_context.get('user_id', 'unknown')),
-                        interaction_count=interaction_count,
-                        chapter=int(chapter),
-                        phase=phase.value,
-                        metadata={
-                            "character_name": character_context.get('nome'),
-                            "character_class": character_context.get('classe'),
-                            "campaign_title": campaign_context.get('title'),
-                            "model_used": self.model,
-                            "message": message[:100]
-                        }
-                    )
+            return await self._complete_chat(
+                result["raw_response"], result.get("usage", {}), message, character_context,
+                campaign_context, conversation_history, generate_actions, interaction_count
+            )
                     
-                    if doc_id:
-                        logger.info(f"Narrativa salva no ChromaDB: {doc_id}")
-                        
-                except Exception as e:
-                    logger.error(f"Erro ao salvar no ChromaDB: {e}")
+        except Exception as e:
+            logger.error(f"Erro ao processar Groq LLM: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Erro interno: {str(e)}"
+            }
+    
+    async def chat_with_llm_stream(
+        self, 
+        message: str, 
+        character_context: Optional[Dict[str, Any]] = None,
+        campaign_context: Optional[Dict[str, Any]] = None,
+        conversation_history: Optional[list] = None,
+        generate_actions: bool = True,
+        max_retries: int = 2,
+        interaction_count: int = 1
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Versão em streaming do chat: emite ("delta", texto) conforme os tokens chegam
+        e termina com ("done", resultado) no mesmo formato de chat_with_llm
+        """
+        if not self.api_key:
+            yield "done", {
+                "success": False,
+                "error": "Groq API key não configurada. Configure GROQ_API_KEY no arquivo .env"
+            }
+            return
+        
+        try:
+            payload = await self._build_chat_payload(
+                message, character_context, campaign_context, conversation_history,
+                generate_actions, interaction_count=interaction_count
+            )
+            response = await self._send_chat({**payload, "stream": True}, max_retries, stream=True)
             
-            progression_info = self._get_progression_info(interaction_count, campaign_context)
+            parts = []
+            usage = {}
+            try:
+                if response.status_code != 200:
+                    await response.aread()
+                    yield "done", self._error_result(response)
+                    return
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[6:]
+                    if data == "[DONE]":
+                        break
+                    chunk = orjson.loads(data)
+                    usage = (chunk.get("x_groq") or {}).get("usage") or chunk.get("usage") or usage
+                    choices = chunk.get("choices")
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        parts.append(delta)
+                        yield "delta", delta
+            finally:
+                await response.aclose()
+            
+            yield "done", await self._complete_chat(
+                "".join(parts), usage, message, character_context,
+                campaign_context, conversation_history, generate_actions, interaction_count
+            )
             
-            return {
-                "success": True,
-                "response": clean_response,
-                "contextual_actions": contextual_actions,
-                "usage": result.get("usage", {}),
-                "provider": "Groq",
-                "progression": progression_info
+        except httpx.TimeoutException:
+            logger.error("Timeout no streaming Groq")
+            yield "done", {
+                "success": False,
+                "error": "Timeout na requisição. Tente novamente."
             }
-                    
         except Exception as e:
-            logger.error(f"Erro ao processar Groq LLM: {str(e)}")
-            return {
+            logger.error(f"Erro no streaming Groq LLM: {str(e)}")
+            yield "done", {
                 "success": False,
                 "error": f"Erro interno: {str(e)}"
             }
     
+    async def _complete_chat(
+        self, llm_response: str, usage: Dict[str, Any], message: str,
+        character_context: Optional[Dict[str, Any]], campaign_context: Optional[Dict[str, Any]],
+        conversation_history: Optional[list], generate_actions: bool, interaction_count: int
+    ) -> Dict[str, Any]:
+        """Extrai ações, salva a narrativa no ChromaDB e monta o resultado final do chat"""
+        logger.info(f"Resposta completa da LLM (Interação {interaction_count}/10): {llm_response}")
+        
+        contextual_actions = []
+        if generate_actions:
+            contextual_actions = self._extract_actions_from_response(llm_response)
+
+            progression_actions = self._get_progression_actions(interaction_count, campaign_context)
+            if progression_actions:
+                contextual_actions.extend(progression_actions)
+            
+            if not contextual_actions or self._is_fallback_actions(contextual_actions):
+                logger.info("Primeira tentativa falhou, tentando formato rigoroso...")
+                strict_result = await self._retry_with_strict_format(
+                    message, character_context, campaign_context, 
+                    conversation_history, interaction_count
+                )
+                
+                if strict_result and strict_result.get("contextual_actions"):
+                    contextual_actions = strict_result["contextual_actions"]
+                    logger.info("Ações extraídas com sucesso no formato rigoroso")
+            
+            logger.info(f"Ações finais extraídas: {contextual_actions}")
+        
+        clean_response = self._clean_response_text(llm_response)
+
+        if campaign_context and character_context:
+            try:
+                chapter = campaign_context.get('current_chapter', 1) or 1
+                phase = self.progression_manager.get_current_phase(interaction_count)
+                
+                doc_id = self.vector_store.store_narrative(
+                    narrative_text=clean_response,
+                    campaign_id=str(campaign_context.get('_id', 'unknown')),
+                    character_id=str(character_context.get('_id', 'unknown')),
+                    user_id=str(campaign_context.get('user_id', 'unknown')),
+                    interaction_count=interaction_count,
+                    chapter=int(chapter),
+                    phase=phase.value,
+                    metadata={
+                        "character_name": character_context.get('nome'),
+                        "character_class": character_context.get('classe'),
+                        "campaign_title": campaign_context.get('title'),
+                        "model_used": self.model,
+                        "message": message[:100]
+                    }
+                )
+                
+                if doc_id:
+                    logger.info(f"Narrativa salva no ChromaDB: {doc_id}")
+                    
+            except Exception as e:
+                logger.error(f"Erro ao salvar no ChromaDB: {e}")
+        
+        progression_info = self._get_progression_info(interaction_count, campaign_context)
+        
+        return {
+            "success": True,
+            "response": clean_response,
+            "contextual_actions": _ACTIONS_ADAPTER.validate_python(contextual_actions),
+            "usage": usage,
+            "provider": "Groq",
+            "progression": progression_info
+        }
+    
     async def _get_relevant_context_from_history(
         self,
         message: str,
@@ -252,66 +396,94 @@ class LLMService:
             logger.error(f"Erro ao buscar contexto RAG: {e}")
             return ""
     
-    async def _make_llm_request(
+    async def _build_chat_payload(
         self, message: str, character_context: Optional[Dict[str, Any]], 
         campaign_context: Optional[Dict[str, Any]], conversation_history: Optional[list],
         generate_actions: bool, use_strict_format: bool = False, 
         interaction_count: int = 1
     ) -> Dict[str, Any]:
-        """Faz a requisição incluindo progressão e RAG"""
-        try:
-            rag_context = await self._get_relevant_context_from_history(
-                message=message,
-                campaign_context=campaign_context,
-                n_results=3
+        """Monta o corpo de /chat/completions com progressão e contexto RAG"""
+        rag_context = await self._get_relevant_context_from_history(
+            message=message,
+            campaign_context=campaign_context,
+            n_results=3
+        )
+        
+        system_message = self._build_system_message(
+            character_context, campaign_context, generate_actions, 
+            use_strict_format, interaction_count, rag_context
+        )
+        
+        messages = [{"role": "system", "content": system_message}]
+
+        if conversation_history:
+            messages.extend(conversation_history[-6:])
+
+        messages.append({"role": "user", "content": message})
+        
+        return {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": min(LLM_MAX_TOKENS, 1200), 
+            "temperature": 0.3 if use_strict_format else LLM_TEMPERATURE
+        }
+    
+    async def _send_chat(
+        self, payload: Dict[str, Any], max_retries: int = 0, stream: bool = False
+    ) -> httpx.Response:
+        """Envia o payload à Groq, repetindo em 429/5xx até max_retries vezes"""
+        client = get_http_client()
+        attempt = 0
+        while True:
+            request = client.build_request("POST", "/chat/completions", json=payload)
+            response = await client.send(request, stream=stream)
+            if response.status_code not in _RETRY_STATUS or attempt >= max_retries:
+                return response
+            await response.aclose()
+            delay = _retry_delay(response, attempt)
+            attempt += 1
+            logger.warning(
+                "Groq respondeu %s, nova tentativa em %.2fs (%s/%s)",
+                response.status_code, delay, attempt, max_retries
             )
-            
-            system_message = self._build_system_message(
-                character_context, campaign_context, generate_actions, 
-                use_strict_format, interaction_count, rag_context
+            await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _error_result(response: httpx.Response) -> Dict[str, Any]:
+        """Converte uma resposta de erro da Groq no resultado padrão do serviço"""
+        if response.status_code == 429:
+            return {
+                "success": False,
+                "error": "Rate limit do Groq atingido. Aguarde alguns segundos e tente novamente."
+            }
+        logger.error(f"Erro na API Groq: {response.status_code} - {response.text}")
+        return {
+            "success": False,
+            "error": f"Erro na API Groq: {response.status_code}"
+        }
+    
+    async def _make_llm_request(
+        self, message: str, character_context: Optional[Dict[str, Any]], 
+        campaign_context: Optional[Dict[str, Any]], conversation_history: Optional[list],
+        generate_actions: bool, use_strict_format: bool = False, 
+        interaction_count: int = 1, max_retries: int = 0
+    ) -> Dict[str, Any]:
+        """Faz a requisição incluindo progressão e RAG (repetindo em 429/5xx até max_retries vezes)"""
+        try:
+            payload = await self._build_chat_payload(
+                message, character_context, campaign_context, conversation_history,
+                generate_actions, use_strict_format, interaction_count
             )
+            response = await self._send_chat(payload, max_retries)
             
-            messages = [{"role": "system", "content": system_message}]
-
-            if conversation_history:
-                messages.extend(conversation_history[-6:])
-
-            messages.append({"role": "user", "content": message})
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.model,
-                        "messages": messages,
-                        "max_tokens": min(LLM_MAX_TOKENS, 1200), 
-                        "temperature": 0.3 if use_strict_format else LLM_TEMPERATURE
-                    },
-                    timeout=20.0 
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "success": True,
-                        "raw_response": data["choices"][0]["message"]["content"],
-                        "usage": data.get("usage", {})
-                    }
-                elif response.status_code == 429:
-                    return {
-                        "success": False,
-                        "error": "Rate limit do Groq atingido. Aguarde alguns segundos e tente novamente."
-                    }
-                else:
-                    logger.error(f"Erro na API Groq: {response.status_code} - {response.text}")
-                    return {
-                        "success": False,
-                        "error": f"Erro na API Groq: {response.status_code}"
-                    }
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                return {
+                    "success": True,
+                    "raw_response": data["choices"][0]["message"]["content"],
+                    "usage": data.get("usage", {})
+                }
+            return self._error_result(response)
                     
         except httpx.TimeoutException:
             logger.error("Timeout na requisição Groq")
@@ -564,11 +736,11 @@ class LLMService:
                 json_text = match.group(1).strip()
                 logger.debug(f"JSON rigoroso encontrado: {json_text}")
                 
-                data = json.loads(json_text)
+                data = orjson.loads(json_text)
                 if isinstance(data.get("actions"), list) and len(data["actions"]) > 0:
                     return self._format_actions(data["actions"])
                     
-        except (json.JSONDecodeError, Exception) as e:
+        except (orjson.JSONDecodeError, Exception) as e:
             logger.debug(f"Erro no padrão rigoroso: {e}")
             
         return []
@@ -586,11 +758,11 @@ class LLMService:
                 
                 for match in matches:
                     try:
-                        data = json.loads(match)
+                        data = orjson.loads(match)
                         if isinstance(data.get("actions"), list) and len(data["actions"]) > 0:
                             logger.debug(f"JSON válido encontrado: {match[:100]}...")
                             return self._format_actions(data["actions"])
-                    except json.JSONDecodeError:
+                    except orjson.JSONDecodeError:
                         continue
                         
         except Exception as e:
@@ -828,8 +1000,6 @@ class LLMService:
         user_id: str
     ) -> Optional[Dict[str, Any]]:
         """Processa entrega de recompensa se detectada"""
-        from app.services.inventory_service import InventoryService
-
         if interaction_count < 8:
             return None
 
@@ -2,9 +2,9 @@ import logging
 import chromadb
 from chromadb.config import Settings
 from typing import Dict, Any, List, Optional
-from datetime import datetime
 import hashlib
 import os
+from app.core.database import utc_now
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +44,14 @@ class VectorStoreService:
             logger.error(f"Erro ao inicializar ChromaDB: {e}")
             raise
     
+    def warmup(self) -> None:
+        """Carrega o modelo de embeddings antecipadamente (evita latência na primeira requisição)"""
+        try:
+            self.lore_collection.query(query_texts=["warmup"], n_results=1)
+            logger.info("Modelo de embeddings carregado")
+        except Exception as e:
+            logger.warning(f"Falha no warmup do ChromaDB: {e}")
+    
     def store_narrative(
         self,
         narrative_text: str,
@@ -68,7 +76,7 @@ class VectorStoreService:
                 "interaction_count": int(interaction_count),
                 "chapter": int(chapter),
                 "phase": phase,
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": utc_now().isoformat(),
                 "world_id": "chromance",
                 **(metadata or {})
             }
@@ -315,7 +323,7 @@ class VectorStoreService:
                 "chapter_discovered": chapter,
                 "campaign_id": campaign_id,
                 "world_id": "chromance",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": utc_now().isoformat(),
                 **metadata
             }
             
@@ -406,15 +414,12 @@ class VectorStoreService:
             if not results.get('ids'):
                 return True
             
-            for i, doc_id in enumerate(results['ids']):
-                self.archive_collection.add(
-                    documents=[results['documents'][i]],
-                    metadatas=[{
-                        **results['metadatas'][i],
-                        "archived_at": datetime.utcnow().isoformat()
-                    }],
-                    ids=[f"archive_{doc_id}"]
-                )
+            archived_at = utc_now().isoformat()
+            self.archive_collection.add(
+                documents=results['documents'],
+                metadatas=[{**metadata, "archived_at": archived_at} for metadata in results['metadatas']],
+                ids=[f"archive_{doc_id}" for doc_id in results['ids']]
+            )
             
             logger.info(f"✓ Arquivadas {len(results['ids'])} narrativas do cap {chapter}")
             return True
@@ -444,7 +449,8 @@ class VectorStoreService:
             
             results = self.narratives_collection.get(
                 where=where_filter,
-                limit=limit
+                limit=limit,
+                include=["documents", "metadatas"]
             )
             
             history = []
@@ -566,7 +572,7 @@ class VectorStoreService:
         chapter: int
     ) -> str:
         """Gera ID único para o documento"""
-        base_string = f"{campaign_id}_{character_id}_{chapter}_{interaction_count}_{datetime.utcnow().timestamp()}"
+        base_string = f"{campaign_id}_{character_id}_{chapter}_{interaction_count}_{utc_now().timestamp()}"
         return hashlib.md5(base_string.encode()).hexdigest()
     
     def _generate_lore_id(
@@ -0,0 +1,52 @@
+"""
+Script único para remover os índices antigos de personagens
+Os índices de campo único e os compostos originais foram substituídos
+pelos dois compostos criados no startup (CharacterRepository.ensure_indexes).
+
+Uso: python scripts/drop_legacy_character_indexes.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.database import get_database
+
+LEGACY_INDEXES = (
+    "user_id_1",
+    "active_1",
+    "is_selected_1",
+    "user_id_1_active_-1",
+    "user_id_1_is_selected_-1",
+)
+
+
+def main():
+    print("RPG Chromance - Remoção de índices antigos de personagens")
+    print("=" * 50)
+    
+    collection = get_database()["characters"]
+    
+    try:
+        existing = collection.index_information()
+        for name in LEGACY_INDEXES:
+            if name in existing:
+                collection.drop_index(name)
+                print(f"  ✓ Removido: {name}")
+            else:
+                print(f"  - Não encontrado: {name}")
+    except Exception as e:
+        print(f"\n✗ Erro ao remover índices: {e}")
+        return 1
+    
+    print("\nÍndices restantes:")
+    for name in collection.index_information():
+        print(f"  {name}")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    exit_code = main()
+    sys.exit(exit_code)
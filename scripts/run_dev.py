@@ -15,4 +15,6 @@ if __name__ == "__main__":
         port=8000,
         reload=True,
         reload_dirs=[str(PROJECT_ROOT)],
+        loop="uvloop",
+        http="httptools",
     )